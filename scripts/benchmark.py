@@ -0,0 +1,149 @@
+"""
+VaultBuddy storage benchmark.
+
+Runs the storage layer against an in-memory keyring that simulates per-call
+backend latency, so numbers reflect how many keyring round-trips each code
+path makes rather than the speed of a particular OS keyring.
+
+Usage: python scripts/benchmark.py [--ops 30] [--latency-ms 2]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from vaultbuddy import render, storage, wal  # noqa: E402
+from vaultbuddy.backends import MemoryBackend, PasswordDeleteError  # noqa: E402
+from vaultbuddy.vault import Vault  # noqa: E402
+
+
+class SlowMemoryKeyring(MemoryBackend):
+    """In-memory backend that sleeps on every call and counts round-trips."""
+
+    def __init__(self, latency: float):
+        super().__init__()
+        self.latency = latency
+        self.calls = 0
+
+    def _tick(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_password(self, service, username):
+        self._tick()
+        return self._data.get((service, username))
+
+    def set_password(self, service, username, password):
+        self._tick()
+        self._data[(service, username)] = password
+
+    def delete_password(self, service, username):
+        self._tick()
+        if self._data.pop((service, username), None) is None:
+            raise PasswordDeleteError("not found")
+
+
+def install(backend: SlowMemoryKeyring) -> None:
+    storage.set_default_vault(Vault(backend, wal_path=wal.wal_path()))
+    storage.init_db(allow_insecure_backend=True)
+    backend.calls = 0
+
+
+def report(label: str, ops: int, elapsed: float, calls: int) -> None:
+    rate = ops / elapsed if elapsed else float("inf")
+    print(
+        f"{label:<28} {ops:>6} ops  {elapsed * 1000:>9.1f} ms  "
+        f"{rate:>9.0f} ops/s  {calls:>6} backend calls"
+    )
+
+
+def bench_batch(ops: int, latency: float) -> None:
+    backend = SlowMemoryKeyring(latency)
+    install(backend)
+    start = time.perf_counter()
+    for i in range(ops):
+        storage.store_secret(f"rotate-{i}", f"value-{i}")
+    report("store_secret (one by one)", ops, time.perf_counter() - start, backend.calls)
+
+    backend = SlowMemoryKeyring(latency)
+    install(backend)
+    start = time.perf_counter()
+    with storage.transaction():
+        for i in range(ops):
+            storage.store_secret(f"rotate-{i}", f"value-{i}")
+    report("transaction batch", ops, time.perf_counter() - start, backend.calls)
+
+
+def bench_render(ops: int, latency: float) -> None:
+    backend = SlowMemoryKeyring(0)
+    install(backend)
+    with storage.transaction():
+        for i in range(ops):
+            storage.store_secret(f"ref-{i}", f"value-{i}")
+    names = [f"ref-{i}" for i in range(ops)]
+    backend.latency = latency
+
+    scenarios = (("render resolve (serial)", 1), ("render resolve (parallel)", render.DEFAULT_JOBS))
+    for label, jobs in scenarios:
+        backend.calls = 0
+        start = time.perf_counter()
+        render.resolve(names, jobs=jobs)
+        report(label, ops, time.perf_counter() - start, backend.calls)
+
+
+def bench_audit(ops: int) -> None:
+    backend = SlowMemoryKeyring(0)
+    install(backend)
+    storage.store_secret("hot", "value")
+    for label, enabled in (("get_secret (audit off)", False), ("get_secret (audit on)", True)):
+        if enabled:
+            storage.enable_audit()
+        backend.calls = 0
+        start = time.perf_counter()
+        for _ in range(ops):
+            storage.get_secret("hot")
+        report(label, ops, time.perf_counter() - start, backend.calls)
+    storage.disable_audit()
+
+
+def bench_sweep(ops: int, latency: float, size: int = 5000) -> None:
+    backend = SlowMemoryKeyring(0)
+    install(backend)
+    past = time.time() - 1
+    with storage.transaction():
+        for i in range(size):
+            storage.store_secret(f"long-lived-{i}", "value")
+        for i in range(ops):
+            storage.store_secret(f"token-{i}", "value", expires_at=past)
+    backend.latency = latency
+    backend.calls = 0
+    start = time.perf_counter()
+    removed = storage.sweep()
+    report(f"sweep ({size} live entries)", len(removed), time.perf_counter() - start, backend.calls)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ops", type=int, default=30, help="operations per scenario")
+    parser.add_argument(
+        "--latency-ms", type=float, default=2.0, help="simulated latency per keyring call"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        os.environ["VAULTBUDDY_HOME"] = home
+        latency = args.latency_ms / 1000
+        print(f"Simulated keyring latency: {args.latency_ms} ms/call\n")
+        bench_batch(args.ops, latency)
+        bench_render(args.ops, latency)
+        bench_audit(args.ops * 100)
+        bench_sweep(args.ops, latency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Opt-in, append-only audit log of vault operations.
+
+Storage operations only append a small record to an in-memory ring buffer; a
+background thread writes records out in batches with one fsync per batch.
+Each record carries the hash of the previous one, so edits, deletions and
+reordering are detectable with :func:`verify`. The log holds secret names and
+outcomes, never values.
+"""
+
+import atexit
+import getpass
+import hashlib
+import json
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # Windows: single-writer assumption
+    fcntl = None  # type: ignore
+
+from .paths import state_path
+
+AUDIT_FILENAME = "audit.log"
+GENESIS_HASH = "0" * 64
+DEFAULT_CAPACITY = 4096
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_BACKUPS = 5
+
+
+def default_path() -> str:
+    return os.getenv("VAULTBUDDY_AUDIT_LOG", "").strip() or state_path(AUDIT_FILENAME)
+
+
+def _record_hash(record: Dict[str, object]) -> str:
+    body = {k: v for k, v in record.items() if k != "hash"}
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _last_hash(path: str) -> Optional[str]:
+    """Hash of the last record in ``path``, read from the file tail."""
+    try:
+        with open(path, "rb") as fh:
+            fh.seek(0, os.SEEK_END)
+            size = fh.tell()
+            fh.seek(max(0, size - 8192))
+            lines = fh.read().splitlines()
+    except OSError:
+        return None
+    for line in reversed(lines):
+        try:
+            return str(json.loads(line)["hash"])
+        except (ValueError, KeyError):
+            continue
+    return None
+
+
+def log_files(path: str, backups: int = DEFAULT_BACKUPS) -> List[str]:
+    """Existing log files, oldest first."""
+    rotated = [f"{path}.{i}" for i in range(backups, 0, -1)]
+    return [p for p in rotated + [path] if os.path.exists(p)]
+
+
+class AuditLog:
+    """Ring-buffered audit writer with batched flushing and size-based rotation."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        capacity: int = DEFAULT_CAPACITY,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backups: int = DEFAULT_BACKUPS,
+    ):
+        self.path = path or default_path()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0
+        self._buffer: Deque[Dict[str, object]] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        try:
+            self._user = getpass.getuser()
+        except Exception:
+            self._user = "unknown"
+        self._thread = threading.Thread(target=self._run, name="vaultbuddy-audit", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, op: str, name: str, ok: bool = True) -> None:
+        """Queues one record; never blocks on disk I/O."""
+        entry = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="microseconds"),
+            "user": self._user,
+            "pid": os.getpid(),
+            "op": op,
+            "name": name,
+            "ok": ok,
+        }
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1  # deque drops the oldest record
+            self._buffer.append(entry)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except OSError:
+                pass  # retried on the next tick; records stay bounded by the ring
+
+    def flush(self) -> int:
+        """Writes all buffered records; returns how many were written."""
+        with self._write_lock:
+            with self._lock:
+                batch = list(self._buffer)
+                self._buffer.clear()
+                dropped, self.dropped = self.dropped, 0
+            if dropped:
+                # Make buffer overflow visible in the chain instead of a silent gap
+                batch.insert(0, {
+                    "ts": datetime.now(timezone.utc).isoformat(timespec="microseconds"),
+                    "user": self._user, "pid": os.getpid(), "op": "dropped",
+                    "name": "", "ok": False, "count": dropped,
+                })
+            if not batch:
+                return 0
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), mode=0o700, exist_ok=True)
+            with self._interprocess_lock():
+                # Size check, rotation, chain head and append all happen under one
+                # lock on a file that is never renamed, so writers cannot interleave.
+                try:
+                    if os.path.getsize(self.path) >= self.max_bytes:
+                        self._rotate()
+                except FileNotFoundError:
+                    pass
+                fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+                with os.fdopen(fd, "ab") as fh:
+                    prev = _last_hash(self.path) or _last_hash(f"{self.path}.1") or GENESIS_HASH
+                    self._write(fh, batch, prev)
+            return len(batch)
+
+    @contextmanager
+    def _interprocess_lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)  # releases the lock
+
+    @staticmethod
+    def _write(fh, batch: List[Dict[str, object]], prev: str) -> None:
+        lines = []
+        for entry in batch:
+            entry["prev"] = prev
+            entry["hash"] = prev = _record_hash(entry)
+            lines.append(json.dumps(entry, separators=(",", ":")) + "\n")
+        fh.write("".join(lines).encode("utf-8"))
+        fh.flush()
+        os.fsync(fh.fileno())
+
+    def _rotate(self) -> None:
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def close(self) -> None:
+        """Stops the flusher and writes everything still buffered."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+
+def iter_records(
+    path: str, backups: int = DEFAULT_BACKUPS
+) -> Iterator[Tuple[str, int, Optional[Dict[str, object]]]]:
+    """Yields (file, line number, record or None if unparsable), oldest first."""
+    for file in log_files(path, backups):
+        with open(file, encoding="utf-8") as fh:
+            for lineno, line in enumerate(fh, 1):
+                try:
+                    yield file, lineno, json.loads(line)
+                except ValueError:
+                    yield file, lineno, None
+
+
+def verify(path: str, backups: int = DEFAULT_BACKUPS) -> Tuple[bool, int, str]:
+    """Checks every record's hash and its link to the previous record.
+
+    Returns (ok, records checked, problem description). The first retained
+    record anchors the chain, since older rotated files may have been pruned.
+    """
+    prev: Optional[str] = None
+    count = 0
+    for file, lineno, record in iter_records(path, backups):
+        where = f"{os.path.basename(file)}:{lineno}"
+        if record is None:
+            return False, count, f"unparsable record at {where}"
+        if record.get("hash") != _record_hash(record):
+            return False, count, f"record modified at {where}"
+        if prev is not None and record.get("prev") != prev:
+            return False, count, f"chain broken at {where} (record removed or reordered)"
+        prev = str(record["hash"])
+        count += 1
+    return True, count, ""
+
+
+def tail(path: str, count: int, backups: int = DEFAULT_BACKUPS) -> List[Dict[str, object]]:
+    return [r for _, _, r in deque(iter_records(path, backups), maxlen=count) if r is not None]
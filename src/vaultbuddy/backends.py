@@ -0,0 +1,152 @@
+"""
+Secret backends a :class:`vaultbuddy.vault.Vault` can run on.
+
+A backend is anything with keyring-style ``get_password``/``set_password``/
+``delete_password`` methods plus an ``identity()`` used for the security check.
+"""
+
+from typing import Dict, Optional, Protocol, Tuple
+
+try:
+    import keyring  # type: ignore
+    try:
+        from keyring.errors import InitError, PasswordDeleteError, PasswordSetError  # type: ignore
+    except Exception:
+        class PasswordDeleteError(Exception):
+            pass
+
+        class InitError(Exception):
+            pass
+
+        class PasswordSetError(Exception):
+            pass
+    try:
+        from keyring.errors import KeyringLocked  # type: ignore
+    except Exception:
+        class KeyringLocked(Exception):  # older keyring releases
+            pass
+except Exception as exc:
+    raise RuntimeError(
+        "The 'keyring' package is required. Install with 'pip install keyring'."
+    ) from exc
+
+
+class Backend(Protocol):
+    def get_password(self, service: str, username: str) -> Optional[str]: ...
+
+    def set_password(self, service: str, username: str, password: str) -> None: ...
+
+    def delete_password(self, service: str, username: str) -> None:
+        """Removes an entry; raises PasswordDeleteError if it does not exist."""
+
+    def identity(self) -> Tuple[str, str]:
+        """Returns (module_path, class_name) of the underlying store."""
+
+
+class KeyringBackend:
+    """The OS keyring via the ``keyring`` package.
+
+    The active keyring is resolved once, on first use, and reused afterwards.
+    """
+
+    def __init__(self, impl=None):
+        self._impl = impl
+
+    @property
+    def impl(self):
+        if self._impl is None:
+            self._impl = keyring.get_keyring()
+        return self._impl
+
+    def get_password(self, service: str, username: str) -> Optional[str]:
+        return self.impl.get_password(service, username)
+
+    def set_password(self, service: str, username: str, password: str) -> None:
+        self.impl.set_password(service, username, password)
+
+    def delete_password(self, service: str, username: str) -> None:
+        self.impl.delete_password(service, username)
+
+    def identity(self) -> Tuple[str, str]:
+        try:
+            cls = self.impl.__class__
+        except Exception:
+            return "unknown", "Unknown"
+        return getattr(cls, "__module__", "unknown"), getattr(cls, "__name__", "Unknown")
+
+
+class MemoryBackend:
+    """Process-local dict store for tests and embedders; never persisted."""
+
+    def __init__(self):
+        self._data: Dict[Tuple[str, str], str] = {}
+
+    def get_password(self, service: str, username: str) -> Optional[str]:
+        return self._data.get((service, username))
+
+    def set_password(self, service: str, username: str, password: str) -> None:
+        self._data[(service, username)] = password
+
+    def delete_password(self, service: str, username: str) -> None:
+        if self._data.pop((service, username), None) is None:
+            raise PasswordDeleteError("not found")
+
+    def identity(self) -> Tuple[str, str]:
+        return __name__, type(self).__name__
+
+
+class NullBackend:
+    """Stores nothing: every read misses and every write is discarded."""
+
+    def get_password(self, service: str, username: str) -> Optional[str]:
+        return None
+
+    def set_password(self, service: str, username: str, password: str) -> None:
+        pass
+
+    def delete_password(self, service: str, username: str) -> None:
+        raise PasswordDeleteError("not found")
+
+    def identity(self) -> Tuple[str, str]:
+        return __name__, type(self).__name__
+
+
+def classify_backend(module_path: str, class_name: str) -> Tuple[bool, str, str]:
+    """Decides whether a backend identity is considered secure.
+
+    Returns (is_secure, identity, reason).
+    """
+    identity = f"{module_path}.{class_name}"
+
+    # Allow-list of expected secure backends on major platforms
+    secure_prefixes = (
+        "keyring.backends.Windows",        # Windows Credential Locker / DPAPI
+        "keyring.backends.macOS",          # macOS Keychain
+        "keyring.backends.SecretService",  # Linux Secret Service (GNOME Keyring)
+        "keyring.backends.kwallet",        # KDE KWallet
+    )
+
+    insecure_indicators = (
+        "keyrings.alt",             # plaintext/file-based backends from keyrings.alt
+        "keyring.backends.fail",    # non-functional/insecure
+        "keyring.backends.null",    # no-op
+        "plaintext",                # any plaintext hint
+        "Plaintext",                # class naming hint
+    )
+
+    # Explicitly block known-insecure signals
+    lowered = identity.lower()
+    if any(indicator in lowered for indicator in insecure_indicators):
+        return False, identity, "Backend appears insecure (plaintext/null/fail)."
+
+    # Treat chainer as insecure unless it chains only to secure backends. We cannot
+    # introspect safely here, so default to warning.
+    if "keyring.backends.chainer" in lowered:
+        return False, identity, "Chained backend detected; unable to verify security."
+
+    # If matches known good prefixes, consider secure
+    if any(module_path.startswith(pref) for pref in secure_prefixes):
+        return True, identity, "Recognized secure OS-native backend."
+
+    # Fallback: unknown backend → warn as insecure
+    return False, identity, "Unknown backend; security cannot be assured."
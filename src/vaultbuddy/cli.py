@@ -1,17 +1,30 @@
 import getpass
+import json
+import os
+import shlex
+import sys
 import threading
 import time
+from typing import List, Optional, Tuple
 try:
     import typer  # type: ignore
 except Exception as exc:
     raise RuntimeError("The 'typer' package is required. Install with 'pip install typer'.") from exc
 
+from .completion import SHELLS, completion_script, read_name_cache
 from .crypto import validate_secret_name
+from .render import DEFAULT_JOBS, MissingSecretsError, render_file
+from .resilience import BackendError
 from .storage import (
-    init_db, store_secret, get_secret, list_secrets, delete_secret
+    init_db, store_secret, get_secret, list_secrets, delete_secret, transaction,
+    refresh_name_cache, configure_backend, sweep, refresh,
 )
 
 app = typer.Typer(add_completion=False, help="VaultBuddy - OS keyring-backed secrets manager")
+sync_app = typer.Typer(help="Delta sync with another vault over a Unix socket or a command's stdio")
+app.add_typer(sync_app, name="sync")
+audit_app = typer.Typer(help="Inspect the audit log (enable with VAULTBUDDY_AUDIT=1)")
+app.add_typer(audit_app, name="audit")
 
 
 @app.callback()
@@ -23,21 +36,50 @@ def _init(
         "--allow-insecure-backend",
         help="Allow running with insecure/unknown keyring backend (NOT RECOMMENDED)",
     ),
+    backend_timeout: Optional[float] = typer.Option(
+        None,
+        "--backend-timeout",
+        help="Seconds to wait for each keyring call (default 15, env VAULTBUDDY_BACKEND_TIMEOUT)",
+    ),
 ) -> None:
     """Initialize app context and storage with backend security enforcement."""
     ctx.ensure_object(dict)
     ctx.obj["verbose"] = bool(verbose)
+    if ctx.invoked_subcommand in {"completion", "audit"}:
+        # Printing the script or reading the log needs no backend access
+        return
+    if backend_timeout is not None:
+        configure_backend(timeout=backend_timeout)
     init_db(allow_insecure_backend=allow_insecure_backend)
+    if read_name_cache() is None:
+        refresh_name_cache()
+
+
+_TTL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _parse_ttl(text: str) -> int:
+    """Parses a lifetime such as ``90``, ``30s``, ``15m``, ``12h`` or ``7d`` into seconds."""
+    text = text.strip().lower()
+    unit = _TTL_UNITS.get(text[-1:])
+    number = text[:-1] if unit else text
+    if not number.isdigit() or int(number) <= 0:
+        raise typer.BadParameter("TTL must be a positive number with optional unit s, m, h or d")
+    return int(number) * (unit or 1)
 
 
 @app.command()
 def add(
     ctx: typer.Context,
     name: str = typer.Argument(..., help="Secret name"),
+    ttl: Optional[str] = typer.Option(
+        None, "--ttl", help="Expire the secret after this long, e.g. 30m, 12h, 7d"
+    ),
 ):
     is_valid, error_msg = validate_secret_name(name)
     if not is_valid:
         raise typer.BadParameter(error_msg)
+    ttl_seconds = _parse_ttl(ttl) if ttl is not None else None
     existing = get_secret(name)
     if existing is not None:
         verbose = bool(ctx.obj.get("verbose", False))
@@ -50,7 +92,8 @@ def add(
     if not value:
         typer.echo("❌ Secret value cannot be empty")
         raise typer.Exit(code=1)
-    store_secret(name, value)
+    expires_at = time.time() + ttl_seconds if ttl_seconds is not None else None
+    store_secret(name, value, expires_at=expires_at)
     # Reduce lifetime of secret value in memory
     value = ""  # strings are immutable; rebinding reduces reference lifetime only
     verbose = bool(ctx.obj.get("verbose", False))
@@ -102,6 +145,255 @@ def delete(
         typer.echo(f"❌ Secret '{name}' not found")
 
 
+@app.command(name="sweep")
+def sweep_cmd(ctx: typer.Context):
+    """Delete expired secrets from the keyring."""
+    removed = sweep()
+    if not removed:
+        typer.echo("ℹ️ No expired secrets")
+        return
+    typer.echo(f"✅ Removed {len(removed)} expired secret(s)")
+    if bool(ctx.obj.get("verbose", False)):
+        for n in removed:
+            typer.echo(f"  - {n}")
+
+
+@app.command()
+def apply(
+    plan: str = typer.Argument(..., help="JSON Lines plan of set/delete operations (- for stdin)"),
+):
+    """Apply a batch of operations atomically, e.g. a credential rotation.
+
+    Each line is {"op": "set", "name": ..., "value": ...} or {"op": "delete", "name": ...}.
+    """
+    try:
+        with typer.open_file(plan, encoding="utf-8") as fh:
+            ops = _parse_plan(fh)
+    except OSError as exc:
+        raise typer.BadParameter(f"cannot read plan: {exc.strerror or exc}") from None
+    stored = deleted = 0
+    with transaction():
+        for op, name, value in ops:
+            if op == "set":
+                store_secret(name, value)
+                stored += 1
+            elif delete_secret(name):
+                deleted += 1
+    typer.echo(f"✅ Applied {len(ops)} operations ({stored} stored, {deleted} deleted)")
+
+
+def _parse_plan(lines) -> List[Tuple[str, str, Optional[str]]]:
+    """Validates the whole plan up front so a bad line never leaves a partial batch."""
+    ops: List[Tuple[str, str, Optional[str]]] = []
+    for lineno, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            raise typer.BadParameter(f"line {lineno}: not valid JSON") from None
+        if not isinstance(entry, dict):
+            raise typer.BadParameter(f"line {lineno}: expected a JSON object")
+        op = entry.get("op")
+        name = entry.get("name")
+        if op not in {"set", "delete"}:
+            raise typer.BadParameter(f"line {lineno}: op must be 'set' or 'delete'")
+        is_valid, error_msg = validate_secret_name(name if isinstance(name, str) else "")
+        if not is_valid:
+            raise typer.BadParameter(f"line {lineno}: {error_msg}")
+        value = entry.get("value")
+        if op == "set" and (not isinstance(value, str) or not value):
+            raise typer.BadParameter(f"line {lineno}: 'set' requires a non-empty string value")
+        ops.append((op, name, value if op == "set" else None))
+    return ops
+
+
+@app.command()
+def render(
+    ctx: typer.Context,
+    template: str = typer.Argument(..., help="Template containing {{ secret:NAME }} placeholders"),
+    output: str = typer.Option(
+        ..., "--output", "-o", help="File to write (created with 0600 permissions)"
+    ),
+    jobs: int = typer.Option(
+        DEFAULT_JOBS, "--jobs", "-j", min=1, help="Secrets fetched in parallel"
+    ),
+):
+    """Render a template (e.g. a .env file) with secrets substituted.
+
+    Values are written only to the output file, never to stdout.
+    """
+    try:
+        written = render_file(template, output, jobs=jobs)
+    except MissingSecretsError as exc:
+        verbose = bool(ctx.obj.get("verbose", False))
+        detail = f": {', '.join(exc.names)}" if verbose else ""
+        typer.echo(f"❌ {exc}{detail}")
+        raise typer.Exit(code=1) from None
+    except OSError as exc:
+        typer.echo(f"❌ Failed to render template: {exc.strerror or exc}")
+        raise typer.Exit(code=1) from None
+    if written:
+        typer.echo(f"✅ Rendered {output}")
+    else:
+        typer.echo(f"ℹ️ {output} is up to date; not rewritten")
+
+
+def _sync_passphrase(passphrase_file: Optional[str] = None, prompt: bool = True) -> str:
+    if passphrase_file:
+        with open(passphrase_file, encoding="utf-8") as fh:
+            passphrase = fh.read().rstrip("\r\n")
+    else:
+        passphrase = os.getenv("VAULTBUDDY_SYNC_PASSPHRASE", "")
+    if not passphrase and not prompt:
+        # getpass would fall back to stdin, which carries the protocol
+        typer.echo(
+            "❌ Set VAULTBUDDY_SYNC_PASSPHRASE or pass --passphrase-file with --stdio",
+            err=True,
+        )
+        raise typer.Exit(code=1)
+    if not passphrase:
+        passphrase = getpass.getpass("Sync passphrase: ")
+    if not passphrase:
+        typer.echo("❌ Sync passphrase cannot be empty", err=True)
+        raise typer.Exit(code=1)
+    return passphrase
+
+
+@sync_app.command("serve")
+def sync_serve(
+    socket_path: Optional[str] = typer.Option(
+        None, "--socket", help="Unix socket path to listen on"
+    ),
+    stdio: bool = typer.Option(False, "--stdio", help="Serve one session over stdin/stdout"),
+    once: bool = typer.Option(False, "--once", help="Exit after the first session"),
+    passphrase_file: Optional[str] = typer.Option(
+        None, "--passphrase-file", help="Read the sync passphrase from this file"
+    ),
+):
+    """Serve this vault to a 'vaultbuddy sync connect' peer."""
+    from .sync import (
+        Channel,
+        SyncError,
+        VaultReplica,
+        require_cryptography,
+        serve_session,
+        serve_socket,
+    )
+
+    if bool(socket_path) == stdio:
+        raise typer.BadParameter("Pass exactly one of --socket or --stdio")
+    try:
+        require_cryptography()
+        passphrase = _sync_passphrase(passphrase_file, prompt=not stdio)
+        if stdio:
+            # stdout carries the protocol; nothing else may be printed there
+            serve_session(Channel(sys.stdin.buffer, sys.stdout.buffer), VaultReplica(), passphrase)
+        else:
+            typer.echo(f"🔄 Serving sync on {socket_path} (Ctrl+C to stop)", err=True)
+            serve_socket(socket_path, VaultReplica(), passphrase, once=once)
+    except (SyncError, OSError) as exc:
+        typer.echo(f"❌ Sync failed: {exc}", err=True)
+        raise typer.Exit(code=1) from None
+
+
+@sync_app.command("connect")
+def sync_connect(
+    socket_path: Optional[str] = typer.Option(
+        None, "--socket", help="Unix socket of a 'sync serve' peer"
+    ),
+    command: Optional[str] = typer.Option(
+        None,
+        "--command",
+        help="Command whose stdio is the peer, e.g. 'ssh host vaultbuddy sync serve --stdio'",
+    ),
+    passphrase_file: Optional[str] = typer.Option(
+        None, "--passphrase-file", help="Read the sync passphrase from this file"
+    ),
+):
+    """Sync with a peer vault, transferring only the entries that differ."""
+    from .sync import (
+        SyncError,
+        VaultReplica,
+        connect_socket,
+        require_cryptography,
+        spawn_command,
+        stop_command,
+        sync_client,
+    )
+
+    if bool(socket_path) == bool(command):
+        raise typer.BadParameter("Pass exactly one of --socket or --command")
+    try:
+        require_cryptography()
+        passphrase = _sync_passphrase(passphrase_file)
+        if socket_path:
+            channel, sock = connect_socket(socket_path)
+            with sock:
+                report = sync_client(channel, VaultReplica(), passphrase)
+        else:
+            channel, proc = spawn_command(shlex.split(command))
+            try:
+                report = sync_client(channel, VaultReplica(), passphrase)
+            finally:
+                stop_command(proc)
+    except (SyncError, OSError) as exc:
+        typer.echo(f"❌ Sync failed: {exc}")
+        raise typer.Exit(code=1) from None
+    kib = (report.bytes_sent + report.bytes_received) / 1024
+    typer.echo(
+        f"✅ Sync complete: pulled {report.pulled}, pushed {report.pushed} "
+        f"({kib:.1f} KiB in {report.round_trips} round-trips)"
+    )
+
+
+@audit_app.command("tail")
+def audit_tail(
+    lines: int = typer.Option(20, "--lines", "-n", min=1, help="Number of records to show"),
+):
+    """Show the most recent audit records."""
+    from .audit import default_path, tail
+
+    records = tail(default_path(), lines)
+    if not records:
+        typer.echo("📂 No audit records")
+        return
+    for r in records:
+        status = "ok" if r.get("ok") else "failed"
+        detail = f" ({r['count']} records lost)" if r.get("op") == "dropped" else ""
+        typer.echo(
+            f"{r.get('ts')}  {r.get('user')}  {r.get('op'):<7} {r.get('name')}  {status}{detail}"
+        )
+
+
+@audit_app.command("verify")
+def audit_verify():
+    """Verify the audit log's hash chain."""
+    from .audit import default_path, verify
+
+    ok, count, problem = verify(default_path())
+    if not ok:
+        typer.echo(f"❌ Audit log verification failed after {count} records: {problem}")
+        raise typer.Exit(code=1)
+    typer.echo(f"✅ Audit log intact ({count} records)")
+
+
+@app.command()
+def completion(
+    shell: str = typer.Argument(..., help="Shell to generate completion for: bash, zsh or fish"),
+):
+    """Print a shell completion script for commands and secret names.
+
+    Names are answered from a local cache of names only, so pressing Tab
+    never starts the keyring. Example: vaultbuddy completion bash >> ~/.bashrc
+    """
+    if shell not in SHELLS:
+        raise typer.BadParameter(f"Choose one of: {', '.join(SHELLS)}")
+    commands = [c.name or c.callback.__name__ for c in app.registered_commands]
+    commands += [g.name for g in app.registered_groups if g.name]
+    typer.echo(completion_script(shell, commands), nl=False)
+
+
 def copy_to_clipboard_with_autoclear(text: str, seconds: int = 30) -> None:
     try:
         import pyperclip
@@ -131,12 +423,21 @@ def copy_to_clipboard_with_autoclear(text: str, seconds: int = 30) -> None:
 
 
 def main():
-    app()
+    try:
+        app()
+    except BackendError as exc:
+        # Fail fast with a readable message instead of a traceback (e.g. locked keyring in CI)
+        typer.echo(f"❌ {exc}", err=True)
+        raise SystemExit(2) from None
 
 
 def interactive() -> None:
     """Interactive TUI-style menu for local runs (no CLI args)."""
-    init_db()
+    try:
+        init_db()
+    except BackendError as exc:
+        print(f"❌ {exc}")
+        return
     while True:
         print("\n" + "="*50)
         print("VaultBuddy - Secure Secrets Manager")
@@ -149,67 +450,77 @@ def interactive() -> None:
         print("-"*50)
 
         choice = input("Select an option (1-5): ").strip()
-
-        if choice == '1':
-            name = input("Enter secret name: ").strip()
-            ok, err = validate_secret_name(name)
-            if not ok:
-                print(f"❌ {err}")
-                continue
-            existing = get_secret(name)
-            if existing is not None:
-                if input("Secret exists. Overwrite? (y/N): ").strip().lower() != 'y':
-                    print("❌ Secret not added")
-                    continue
-            value = getpass.getpass("Enter secret value: ")
-            if not value:
-                print("❌ Secret value cannot be empty")
-                continue
-            try:
-                store_secret(name, value)
-                # Reduce lifetime of secret value in memory
-                value = ""
-                print("✅ Secret stored successfully")
-            except Exception as e:
-                print(f"❌ Error storing secret: {e}")
-        elif choice == '2':
-            name = input("Enter secret name: ").strip()
-            if not name:
-                print("❌ Secret name cannot be empty")
-                continue
-            value = get_secret(name)
-            if value is None:
-                print(f"❌ Secret '{name}' not found")
-                continue
-            if input("Copy to clipboard (auto-clears in 30s)? (y/N): ").strip().lower() == 'y':
-                copy_to_clipboard_with_autoclear(value, 30)
-            else:
-                print("ℹ️ Retrieval succeeded. Not printing secrets to stdout.")
-        elif choice == '3':
-            names = list_secrets()
-            if not names:
-                print("📂 No secrets stored")
-            else:
-                print("📂 Stored secrets:")
-                for i, n in enumerate(names, 1):
-                    print(f"  {i}. {n}")
-        elif choice == '4':
-            name = input("Enter secret name to delete: ").strip()
-            if not name:
-                print("❌ Secret name cannot be empty")
-                continue
-            if input(f"Are you sure you want to delete '{name}'? (y/N): ").strip().lower() != 'y':
-                print("❌ Deletion cancelled")
-                continue
-            if delete_secret(name):
-                print("✅ Secret deleted successfully")
-            else:
-                print(f"❌ Secret '{name}' not found")
-        elif choice == '5':
-            print("\nExiting VaultBuddy. Your secrets are safe!")
-            print("Goodbye!")
-            break
-        else:
-            print("❌ Invalid option. Please enter 1-5.")
+        try:
+            # The session may sit idle for a while; see other processes' changes
+            refresh()
+            if not _menu_choice(choice):
+                break
+        except BackendError as exc:
+            # A locked or unresponsive keyring should not end the session
+            print(f"❌ {exc}")
 
 
+def _menu_choice(choice: str) -> bool:
+    """Runs one menu option; returns False when the user chose to exit."""
+    if choice == '1':
+        name = input("Enter secret name: ").strip()
+        ok, err = validate_secret_name(name)
+        if not ok:
+            print(f"❌ {err}")
+            return True
+        existing = get_secret(name)
+        if existing is not None:
+            if input("Secret exists. Overwrite? (y/N): ").strip().lower() != 'y':
+                print("❌ Secret not added")
+                return True
+        value = getpass.getpass("Enter secret value: ")
+        if not value:
+            print("❌ Secret value cannot be empty")
+            return True
+        try:
+            store_secret(name, value)
+            # Reduce lifetime of secret value in memory
+            value = ""
+            print("✅ Secret stored successfully")
+        except Exception as e:
+            print(f"❌ Error storing secret: {e}")
+    elif choice == '2':
+        name = input("Enter secret name: ").strip()
+        if not name:
+            print("❌ Secret name cannot be empty")
+            return True
+        value = get_secret(name)
+        if value is None:
+            print(f"❌ Secret '{name}' not found")
+            return True
+        if input("Copy to clipboard (auto-clears in 30s)? (y/N): ").strip().lower() == 'y':
+            copy_to_clipboard_with_autoclear(value, 30)
+        else:
+            print("ℹ️ Retrieval succeeded. Not printing secrets to stdout.")
+    elif choice == '3':
+        names = list_secrets()
+        if not names:
+            print("📂 No secrets stored")
+        else:
+            print("📂 Stored secrets:")
+            for i, n in enumerate(names, 1):
+                print(f"  {i}. {n}")
+    elif choice == '4':
+        name = input("Enter secret name to delete: ").strip()
+        if not name:
+            print("❌ Secret name cannot be empty")
+            return True
+        if input(f"Are you sure you want to delete '{name}'? (y/N): ").strip().lower() != 'y':
+            print("❌ Deletion cancelled")
+            return True
+        if delete_secret(name):
+            print("✅ Secret deleted successfully")
+        else:
+            print(f"❌ Secret '{name}' not found")
+    elif choice == '5':
+        print("\nExiting VaultBuddy. Your secrets are safe!")
+        print("Goodbye!")
+        return False
+    else:
+        print("❌ Invalid option. Please enter 1-5.")
+    return True
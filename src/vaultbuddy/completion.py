@@ -0,0 +1,157 @@
+"""
+Shell completion for secret names, answered from a per-user name cache.
+
+This module runs on every Tab press, so it must only import the standard
+library: no typer, no keyring, no backend access. The cache holds secret
+names only (never values) and is rewritten whenever the index changes.
+Annotations are postponed so ``typing`` is never imported on that path.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+
+from .paths import atomic_write, ensure_state_dir, state_path
+
+CACHE_FILENAME = "names.cache"
+CACHE_HEADER = "# vaultbuddy-names v1"
+# A cache older than this is ignored until the next CLI run refreshes it.
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+# Subcommands whose first argument is an existing secret name.
+NAME_COMMANDS = ("get", "delete")
+
+
+def cache_path() -> str:
+    return state_path(CACHE_FILENAME)
+
+
+def write_name_cache(names: set[str] | list[str]) -> None:
+    """Rewrites the cache atomically with owner-only permissions."""
+    ensure_state_dir()
+    lines = [f"{CACHE_HEADER} {int(time.time())}"]
+    lines.extend(sorted(names))
+    atomic_write(cache_path(), [("\n".join(lines) + "\n").encode("utf-8")])
+
+
+def _max_age() -> float:
+    try:
+        return float(os.getenv("VAULTBUDDY_COMPLETION_MAX_AGE", DEFAULT_MAX_AGE))
+    except ValueError:
+        return float(DEFAULT_MAX_AGE)
+
+
+def read_name_cache(max_age: float | None = None) -> list[str] | None:
+    """Returns cached names, or None if the cache is missing, malformed or stale."""
+    try:
+        with open(cache_path(), encoding="utf-8") as fh:
+            header = fh.readline().split()
+            names = [line.rstrip("\n") for line in fh if line.strip()]
+    except (OSError, UnicodeDecodeError):
+        return None
+    if " ".join(header[:-1]) != CACHE_HEADER:
+        return None
+    try:
+        written_at = int(header[-1])
+    except ValueError:
+        return None
+    age = time.time() - written_at
+    if age < 0 or age > (_max_age() if max_age is None else max_age):
+        return None
+    return names
+
+
+def complete(prefix: str) -> list[str]:
+    """Returns cached secret names starting with ``prefix``."""
+    names = read_name_cache()
+    if not names:
+        return []
+    return [n for n in names if n.startswith(prefix)]
+
+
+_BASH = """\
+_vaultbuddy_complete() {{
+    local cur="${{COMP_WORDS[COMP_CWORD]}}" cmd="" i
+    for ((i = 1; i < COMP_CWORD; i++)); do
+        case "${{COMP_WORDS[i]}}" in -*) ;; *) cmd="${{COMP_WORDS[i]}}"; break ;; esac
+    done
+    if [ -z "$cmd" ]; then
+        COMPREPLY=( $(compgen -W "{commands}" -- "$cur") )
+        return
+    fi
+    case "$cmd" in
+        {name_cases})
+            local IFS=$'\\n' name
+            COMPREPLY=()
+            for name in $({helper} -- "$cur"); do
+                COMPREPLY+=( "$(printf '%q' "$name")" )
+            done
+            ;;
+    esac
+}}
+complete -o default -F _vaultbuddy_complete vaultbuddy
+"""
+
+_ZSH = """\
+#compdef vaultbuddy
+_vaultbuddy() {{
+    local -a cmds names
+    local cmd="" w
+    cmds=({commands})
+    for w in ${{words[2,CURRENT-1]}}; do
+        [[ $w == -* ]] || {{ cmd=$w; break }}
+    done
+    if [[ -z $cmd ]]; then
+        compadd -- $cmds
+        return
+    fi
+    case $cmd in
+        {name_cases})
+            names=("${{(@f)$({helper} -- "$PREFIX")}}")
+            compadd -- ${{names:#}}
+            ;;
+    esac
+}}
+compdef _vaultbuddy vaultbuddy
+"""
+
+_FISH = """\
+complete -c vaultbuddy -f
+complete -c vaultbuddy -n "__fish_use_subcommand" -a "{commands}"
+complete -c vaultbuddy -n "__fish_seen_subcommand_from {name_words}" \\
+    -a "({helper} -- (commandline -ct))"
+"""
+
+SHELLS = {"bash": _BASH, "zsh": _ZSH, "fish": _FISH}
+
+
+def completion_script(shell: str, commands: list[str]) -> str:
+    """Renders the completion script for ``shell`` (bash, zsh or fish)."""
+    if shell not in SHELLS:
+        raise ValueError(f"Unsupported shell '{shell}'. Choose one of: {', '.join(SHELLS)}")
+    import shlex  # pulls in ``re``; keep it off the Tab-press path
+
+    helper = f"{shlex.quote(sys.executable)} -m vaultbuddy.completion"
+    return SHELLS[shell].format(
+        commands=" ".join(commands),
+        name_cases="|".join(NAME_COMMANDS),
+        name_words=" ".join(NAME_COMMANDS),
+        helper=helper,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    if args and args[0] == "--":
+        args = args[1:]
+    prefix = args[0] if args else ""
+    matches = complete(prefix)
+    if matches:
+        sys.stdout.write("\n".join(matches) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Per-user state locations and atomic file helpers for VaultBuddy.
+
+Nothing written here ever contains secret values; values stay in the OS keyring.
+This module sits on the shell-completion path, so it sticks to ``os.path`` to
+keep interpreter start-up cheap.
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+
+def state_dir() -> str:
+    """Returns the per-user state directory (override with ``VAULTBUDDY_HOME``)."""
+    override = os.getenv("VAULTBUDDY_HOME", "").strip()
+    if override:
+        return override
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        base = os.getenv("LOCALAPPDATA") or os.path.join(home, "AppData", "Local")
+        return os.path.join(base, "VaultBuddy")
+    if sys.platform == "darwin":
+        return os.path.join(home, "Library", "Application Support", "VaultBuddy")
+    base = os.getenv("XDG_STATE_HOME") or os.path.join(home, ".local", "state")
+    return os.path.join(base, "vaultbuddy")
+
+
+def state_path(filename: str) -> str:
+    return os.path.join(state_dir(), filename)
+
+
+def ensure_state_dir() -> str:
+    """Creates the state directory with owner-only permissions if needed."""
+    path = state_dir()
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+def _create_temp(directory: str, name: str, mode: int) -> tuple[int, str]:
+    """Creates a fresh temp file next to ``name``; never reuses or follows an existing one.
+
+    ``tempfile.mkstemp`` would do, but importing ``tempfile`` costs more than the
+    few lines it saves on the completion path.
+    """
+    flags = (
+        os.O_WRONLY | os.O_CREAT | os.O_EXCL
+        | getattr(os, "O_NOFOLLOW", 0) | getattr(os, "O_BINARY", 0)
+    )
+    for _ in range(100):
+        tmp = os.path.join(directory, f".{name}.{os.urandom(6).hex()}.tmp")
+        try:
+            fd = os.open(tmp, flags, mode)
+        except FileExistsError:
+            continue
+        try:
+            if hasattr(os, "fchmod"):
+                os.fchmod(fd, mode)  # exact mode, whatever the umask
+        except OSError:
+            os.close(fd)
+            os.unlink(tmp)
+            raise
+        return fd, tmp
+    raise FileExistsError(f"Could not create a temporary file next to {name!r}")
+
+
+def atomic_write(path, chunks, mode: int = 0o600) -> None:
+    """Writes the byte ``chunks`` to ``path`` via a fsynced temp file and ``os.replace``.
+
+    Readers observe either the old file or the complete new one, never a torn write.
+    """
+    path = os.fspath(path)
+    directory, name = os.path.split(path)
+    fd, tmp = _create_temp(directory, name, mode)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def file_lock(path: str, blocking: bool = True):
+    """Holds an exclusive ``flock`` on ``path``, creating it if needed.
+
+    Yields False if ``blocking`` is off and another process holds the lock. Where
+    ``fcntl`` is unavailable (Windows) this always yields True without locking.
+    """
+    try:
+        import fcntl  # not needed on the completion path
+    except ImportError:
+        fcntl = None
+    os.makedirs(os.path.dirname(os.path.abspath(path)), mode=0o700, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+        yield True
+    finally:
+        os.close(fd)  # releases the lock
@@ -0,0 +1,91 @@
+"""
+Render templates with ``{{ secret:NAME }}`` placeholders into files.
+
+References are collected in one scan and de-duplicated, then fetched from the
+vault in parallel. Output is assembled in one pass and written atomically with
+owner-only permissions; an unchanged output file is left untouched.
+"""
+
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .paths import atomic_write
+from .storage import get_secret
+
+PLACEHOLDER = re.compile(r"\{\{\s*secret:([^{}\n]+?)\s*\}\}")
+DEFAULT_JOBS = 8
+
+
+class MissingSecretsError(RuntimeError):
+    """A template references secrets that are not in the vault."""
+
+    def __init__(self, names: List[str]):
+        self.names = names
+        super().__init__(f"{len(names)} referenced secret(s) not found")
+
+
+def find_references(text: str) -> List[str]:
+    """Returns referenced secret names, de-duplicated in order of first use."""
+    return list(dict.fromkeys(m.group(1) for m in PLACEHOLDER.finditer(text)))
+
+
+def resolve(
+    names: List[str],
+    fetch: Callable[[str], Optional[str]] = get_secret,
+    jobs: int = DEFAULT_JOBS,
+) -> Dict[str, str]:
+    """Fetches all ``names`` concurrently; raises MissingSecretsError if any are absent."""
+    if not names:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(names)))) as pool:
+        values = dict(zip(names, pool.map(fetch, names), strict=True))
+    missing = [n for n, v in values.items() if v is None]
+    if missing:
+        raise MissingSecretsError(missing)
+    return values  # type: ignore[return-value]
+
+
+def render_chunks(text: str, values: Dict[str, str]) -> Iterator[str]:
+    """Yields the rendered output as alternating literal and value chunks."""
+    pos = 0
+    for match in PLACEHOLDER.finditer(text):
+        yield text[pos:match.start()]
+        yield values[match.group(1)]
+        pos = match.end()
+    yield text[pos:]
+
+
+def _same_content(path: str, chunks: List[bytes]) -> bool:
+    try:
+        if os.path.getsize(path) != sum(len(c) for c in chunks):
+            return False
+        existing = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(65536), b""):
+                existing.update(block)
+    except OSError:
+        return False
+    rendered = hashlib.sha256()
+    for chunk in chunks:
+        rendered.update(chunk)
+    return existing.digest() == rendered.digest()
+
+
+def render_file(template_path: str, output_path: str, jobs: int = DEFAULT_JOBS) -> bool:
+    """Renders ``template_path`` to ``output_path``.
+
+    Returns True if the output was written, False if it was already up to date.
+    """
+    with open(template_path, encoding="utf-8", newline="") as fh:
+        text = fh.read()
+    values = resolve(find_references(text), jobs=jobs)
+    chunks = [c.encode("utf-8") for c in render_chunks(text, values) if c]
+    if _same_content(output_path, chunks):
+        if os.name == "posix" and (os.stat(output_path).st_mode & 0o777) != 0o600:
+            os.chmod(output_path, 0o600)
+        return False
+    atomic_write(output_path, chunks)
+    return True
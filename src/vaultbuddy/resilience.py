@@ -0,0 +1,220 @@
+"""
+Timeouts, jittered retries and a circuit breaker for keyring backend calls.
+
+A locked GNOME Keyring or an unhealthy D-Bus can make a keyring call block
+forever. Every backend call in ``vaultbuddy.storage`` goes through a single
+:class:`ResilientCaller` so such hangs fail fast with a clear error instead.
+"""
+
+import os
+import secrets
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_TIMEOUT = 15.0
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.1
+MAX_BACKOFF = 2.0
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN = 30.0
+
+
+class BackendError(RuntimeError):
+    """The keyring backend could not serve a call."""
+
+
+class BackendTimeoutError(BackendError):
+    """A keyring call did not return within the configured timeout."""
+
+
+class CircuitOpenError(BackendError):
+    """The backend failed repeatedly and calls are being short-circuited."""
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures; allows one trial call after ``cooldown``."""
+
+    def __init__(
+        self, threshold: int, cooldown: float, clock: Callable[[], float] = time.monotonic
+    ):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def retry_in(self) -> float:
+        """Seconds until a trial call is allowed (0 when closed)."""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self.cooldown - self._clock())
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_in_flight or self._clock() - self._opened_at < self.cooldown:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self, trip: bool = False) -> bool:
+        """Counts a failure; returns True if this call opened the breaker."""
+        with self._lock:
+            self._failures += 1
+            was_open = self._opened_at is not None and not self._trial_in_flight
+            self._trial_in_flight = False
+            if trip or self._failures >= self.threshold or self._opened_at is not None:
+                self._opened_at = self._clock()
+                return not was_open
+            return False
+
+
+class ResilientCaller:
+    """Runs backend calls with a timeout, retries transient errors and tracks health.
+
+    ``transient`` errors are retried with full-jitter exponential backoff.
+    ``passthrough`` errors are normal answers from a healthy backend (e.g. "not
+    found") and are re-raised without counting as failures. ``fatal`` errors
+    need the user to act (e.g. a locked keyring) and are raised at once as
+    :class:`BackendError`, without retrying or counting against the breaker. A timeout trips the
+    breaker immediately: a hung backend keeps hanging, and the abandoned worker
+    thread is still blocked inside it.
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        backoff: float = DEFAULT_BACKOFF,
+        breaker: Optional[CircuitBreaker] = None,
+        transient: Tuple[Type[BaseException], ...] = (OSError,),
+        passthrough: Tuple[Type[BaseException], ...] = (),
+        fatal: Tuple[Type[BaseException], ...] = (),
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if timeout is None:
+            timeout = _env_float("VAULTBUDDY_BACKEND_TIMEOUT", DEFAULT_TIMEOUT)
+        if retries is None:
+            retries = int(_env_float("VAULTBUDDY_BACKEND_RETRIES", DEFAULT_RETRIES))
+        if breaker is None:
+            breaker = CircuitBreaker(
+                int(_env_float("VAULTBUDDY_BREAKER_THRESHOLD", DEFAULT_BREAKER_THRESHOLD)),
+                _env_float("VAULTBUDDY_BREAKER_COOLDOWN", DEFAULT_BREAKER_COOLDOWN),
+            )
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.breaker = breaker
+        self.transient = transient
+        self.passthrough = passthrough
+        self.fatal = fatal
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {
+            "calls": 0,
+            "failures": 0,
+            "retries": 0,
+            "timeouts": 0,
+            "short_circuits": 0,
+            "breaker_trips": 0,
+        }
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counters[key] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+    def call(self, fn: Callable[..., T], *args) -> T:
+        op = getattr(fn, "__name__", "backend call")
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count("short_circuits")
+                raise CircuitOpenError(
+                    f"Keyring backend is unavailable after repeated failures; "
+                    f"not retrying {op} for another {self.breaker.retry_in():.0f}s."
+                )
+            self._count("calls")
+            try:
+                result = self._run(fn, args, op)
+            except self.passthrough:
+                self.breaker.record_success()
+                raise
+            except self.fatal as exc:
+                self.breaker.record_success()
+                raise BackendError(f"Keyring backend refused {op}: {exc}") from exc
+            except BackendTimeoutError:
+                self._count("timeouts")
+                self._failed(trip=True)
+                raise
+            except self.transient as exc:
+                self._failed()
+                if attempt >= self.retries or self.breaker.is_open:
+                    raise BackendError(f"Keyring backend error during {op}: {exc}") from exc
+                attempt += 1
+                self._count("retries")
+                cap = min(MAX_BACKOFF, self.backoff * (2 ** attempt))
+                self._sleep(secrets.SystemRandom().uniform(0, cap))
+                continue
+            except Exception:
+                self._failed()
+                raise
+            self.breaker.record_success()
+            return result
+
+    def _failed(self, trip: bool = False) -> None:
+        self._count("failures")
+        if self.breaker.record_failure(trip=trip):
+            self._count("breaker_trips")
+
+    def _run(self, fn: Callable[..., T], args: tuple, op: str) -> T:
+        if not self.timeout or self.timeout <= 0:
+            return fn(*args)
+        outcome: Dict[str, object] = {}
+        done = threading.Event()
+
+        def _target():
+            try:
+                outcome["result"] = fn(*args)
+            except BaseException as exc:
+                outcome["error"] = exc
+            finally:
+                done.set()
+
+        # Daemon thread: a call stuck in the backend must not keep the process alive.
+        threading.Thread(target=_target, name=f"vaultbuddy-{op}", daemon=True).start()
+        if not done.wait(self.timeout):
+            raise BackendTimeoutError(
+                f"Keyring backend did not respond to {op} within {self.timeout:g}s. "
+                "If your keyring is locked, unlock it and retry; adjust the limit with "
+                "--backend-timeout or VAULTBUDDY_BACKEND_TIMEOUT."
+            )
+        if "error" in outcome:
+            raise outcome["error"]  # type: ignore[misc]
+        return outcome["result"]  # type: ignore[return-value]
@@ -1,26 +1,57 @@
 """
 OS keyring-backed storage for secrets and a minimal index for listing.
 
-
+These functions operate on a process-wide default :class:`~vaultbuddy.vault.Vault`
+backed by the OS keyring. Embedders that need their own backend or several
+isolated vaults should use ``Vault`` directly.
 """
 
-from typing import Optional, List, Set, Tuple
-import os
-import sqlite3
-
-try:
-    import keyring  # type: ignore
-    try:
-        from keyring.errors import PasswordDeleteError  # type: ignore
-    except Exception:
-        class PasswordDeleteError(Exception):
-            pass
-except Exception as exc:
-    raise RuntimeError("The 'keyring' package is required. Install with 'pip install keyring'.") from exc
+import threading
+from typing import ContextManager, Dict, List, Optional, Set, Tuple
+
+from . import wal
+from .audit import AuditLog
+from .backends import KeyringBackend, PasswordDeleteError, classify_backend  # noqa: F401
+from .paths import state_path
+from .vault import (  # noqa: F401
+    INDEX_HEADER,
+    INDEX_USERNAME,
+    SERVICE_NAME,
+    WAL_USERNAME_PREFIX,
+    Index,
+    IndexEntry,
+    Transaction,
+    Vault,
+)
+
+# Held around index updates so concurrent CLI processes never lose one
+INDEX_LOCK_FILENAME = "index.lock"
+
+_default: Optional[Vault] = None
+_default_lock = threading.Lock()
+
+
+def default_vault() -> Vault:
+    """Returns the vault behind the module-level functions, creating it on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Vault(
+                KeyringBackend(),
+                wal_path=wal.wal_path(),
+                name_cache=True,
+                index_lock=state_path(INDEX_LOCK_FILENAME),
+            )
+        return _default
 
 
-SERVICE_NAME = "VaultBuddy"
-INDEX_USERNAME = "__index__"
+def set_default_vault(vault: Optional[Vault]) -> None:
+    """Replaces the default vault; None means a fresh keyring vault on next use."""
+    global _default
+    with _default_lock:
+        previous, _default = _default, vault
+    if previous is not None and previous is not vault:
+        previous.close()
 
 
 def init_db(allow_insecure_backend: bool = False) -> None:
@@ -29,48 +60,48 @@ def init_db(allow_insecure_backend: bool = False) -> None:
     Also enforces that a secure keyring backend is in use unless explicitly
     allowed via flag or environment variable ``VAULTBUDDY_ALLOW_INSECURE``.
     """
-    allow_env = os.getenv("VAULTBUDDY_ALLOW_INSECURE", "").strip()
-    allow_flag = allow_insecure_backend or allow_env in {"1", "true", "True", "yes", "YES"}
-    secure, info, reason = is_secure_backend()
-    if not secure and not allow_flag:
-        raise RuntimeError(
-            (
-                "Insecure or unsupported keyring backend detected: "
-                f"{info}. Refusing to continue.\nReason: {reason}\n"
-                "Set env VAULTBUDDY_ALLOW_INSECURE=1 or pass --allow-insecure-backend "
-                "to override (NOT RECOMMENDED)."
-            )
-        )
-    _ensure_index()
+    default_vault().open(allow_insecure_backend=allow_insecure_backend)
+
+
+def configure_backend(
+    timeout: Optional[float] = None,
+    retries: Optional[int] = None,
+    breaker_threshold: Optional[int] = None,
+    breaker_cooldown: Optional[float] = None,
+) -> None:
+    """Replaces the backend call policy; unset options fall back to env/defaults."""
+    default_vault().configure(timeout, retries, breaker_threshold, breaker_cooldown)
 
 
-def _ensure_index() -> None:
-    if keyring.get_password(SERVICE_NAME, INDEX_USERNAME) is None:
-        keyring.set_password(SERVICE_NAME, INDEX_USERNAME, "")
+def backend_stats() -> Dict[str, int]:
+    """Counters for backend calls, retries, timeouts and circuit-breaker events."""
+    return default_vault().stats()
 
 
-def _load_index() -> Set[str]:
-    data = keyring.get_password(SERVICE_NAME, INDEX_USERNAME)
-    if not data:
-        return set()
-    names = [n.strip() for n in data.split("\n") if n.strip()]
-    return set(names)
+def enable_audit(path: Optional[str] = None, **options) -> AuditLog:
+    """Starts recording vault operations to an audit log (see ``vaultbuddy.audit``)."""
+    return default_vault().enable_audit(path, **options)
 
 
-def _save_index(names: Set[str]) -> None:
-    payload = "\n".join(sorted(names))
-    keyring.set_password(SERVICE_NAME, INDEX_USERNAME, payload)
+def disable_audit() -> None:
+    """Flushes and stops the audit log, if one is active."""
+    if _default is not None:
+        _default.disable_audit()
 
 
-def _backend_identity() -> Tuple[str, str]:
-    """Returns (module_path, class_name) of the active keyring backend."""
-    try:
-        kr = keyring.get_keyring()
-        module_path = getattr(kr.__class__, "__module__", "unknown")
-        class_name = getattr(kr.__class__, "__name__", "Unknown")
-        return module_path, class_name
-    except Exception:
-        return "unknown", "Unknown"
+def refresh() -> None:
+    """Makes the default vault re-read its index on the next read."""
+    default_vault().refresh()
+
+
+def index_entries() -> Tuple[str, Dict[str, IndexEntry]]:
+    """Returns this vault's replica id and all index entries, tombstones included."""
+    return default_vault().index_entries()
+
+
+def refresh_name_cache(names: Optional[Set[str]] = None) -> None:
+    """Rewrites the shell-completion name cache; never fails a vault operation."""
+    default_vault().refresh_name_cache(names)
 
 
 def is_secure_backend() -> Tuple[bool, str, str]:
@@ -78,74 +109,53 @@ def is_secure_backend() -> Tuple[bool, str, str]:
 
     Returns (is_secure, identity, reason).
     """
-    module_path, class_name = _backend_identity()
-    identity = f"{module_path}.{class_name}"
-
-    # Allow-list of expected secure backends on major platforms
-    secure_prefixes = (
-        "keyring.backends.Windows",        # Windows Credential Locker / DPAPI
-        "keyring.backends.macOS",          # macOS Keychain
-        "keyring.backends.SecretService",  # Linux Secret Service (GNOME Keyring)
-        "keyring.backends.kwallet",        # KDE KWallet
-    )
-
-    insecure_indicators = (
-        "keyrings.alt",             # plaintext/file-based backends from keyrings.alt
-        "keyring.backends.fail",    # non-functional/insecure
-        "keyring.backends.null",    # no-op
-        "plaintext",                # any plaintext hint
-        "Plaintext",                # class naming hint
-    )
-
-    # Explicitly block known-insecure signals
-    lowered = identity.lower()
-    if any(indicator in lowered for indicator in insecure_indicators):
-        return False, identity, "Backend appears insecure (plaintext/null/fail)."
-
-    # Treat chainer as insecure unless it chains only to secure backends. We cannot
-    # introspect safely here, so default to warning.
-    if "keyring.backends.chainer" in lowered:
-        return False, identity, "Chained backend detected; unable to verify security."
-
-    # If matches known good prefixes, consider secure
-    if any(module_path.startswith(pref) for pref in secure_prefixes):
-        return True, identity, "Recognized secure OS-native backend."
-
-    # Fallback: unknown backend → warn as insecure
-    return False, identity, "Unknown backend; security cannot be assured."
-
-
-def store_secret(name: str, value: str) -> None:
-    """Stores a secret in the OS keyring and updates the index."""
-    keyring.set_password(SERVICE_NAME, name, value)
-    names = _load_index()
-    names.add(name)
-    _save_index(names)
+    return default_vault().is_secure()
+
+
+def store_secret(name: str, value: str, expires_at: Optional[float] = None) -> None:
+    """Stores a secret in the OS keyring and updates the index.
+
+    ``expires_at`` (epoch seconds) makes the secret read as missing from then on.
+    """
+    default_vault().store_secret(name, value, expires_at=expires_at)
 
 
 def get_secret(name: str) -> Optional[str]:
     """Retrieves a secret from the OS keyring by name."""
-    return keyring.get_password(SERVICE_NAME, name)
+    return default_vault().get_secret(name)
 
 
 def list_secrets() -> List[str]:
     """Lists all stored secret names from the index."""
-    return sorted(_load_index())
+    return default_vault().list_secrets()
 
 
 def delete_secret(name: str) -> bool:
     """Deletes a secret by name from the OS keyring and updates the index."""
-    try:
-        keyring.delete_password(SERVICE_NAME, name)
-    except PasswordDeleteError:
-        return False
-    names = _load_index()
-    if name in names:
-        names.remove(name)
-        _save_index(names)
-    return True
+    return default_vault().delete_secret(name)
 
 
-# Migration helpers removed to reduce attack surface and dependency on legacy crypto.
+def sweep(now: Optional[float] = None) -> List[str]:
+    """Deletes expired secrets with a single index update; returns their names."""
+    return default_vault().sweep(now)
+
+
+def transaction() -> ContextManager[Transaction]:
+    """Groups store/delete calls into one crash-safe batch with a single index commit.
+
+    Inside the block, ``store_secret``/``delete_secret`` are staged and
+    ``get_secret``/``list_secrets`` see the staged state. Nothing is applied if
+    the block raises. Nested blocks join the outermost batch.
+    """
+    return default_vault().transaction()
+
+
+def recover_pending() -> Optional[str]:
+    """Finishes or undoes a batch interrupted by a crash.
+
+    Returns ``"replayed"`` or ``"rolled back"`` if a batch was found, else None.
+    """
+    return default_vault().recover_pending()
 
 
+# Migration helpers removed to reduce attack surface and dependency on legacy crypto.
@@ -0,0 +1,503 @@
+"""
+Delta sync between two vaults over a pipe or socket.
+
+Each side summarises its index as a digest tree: entries are bucketed by the
+first hex digits of ``sha256(name)``, each leaf hashes its entries' versions
+and each inner node hashes its children. The client descends only into
+subtrees whose digests differ, compares entry versions in the differing
+leaves, and exchanges just the changed entries in a single round-trip. The
+higher ``(version, origin)`` wins; deletions travel as tombstones, and
+expiry and tombstone purge deadlines travel with their entries.
+
+After a plaintext handshake every message is encrypted and authenticated with
+AES-GCM under per-direction keys derived from a shared passphrase. This needs
+the optional ``cryptography`` package (``pip install vaultbuddy[sync]``).
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import socket
+import stat
+import struct
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from . import storage
+from .crypto import validate_secret_name
+from .vault import INDEX_USERNAME, WAL_USERNAME_PREFIX, IndexEntry, Vault
+
+PROTOCOL = "vaultbuddy-sync/1"
+TREE_DEPTH = 3
+DIGEST_HEX = 32
+MAX_FRAME = 64 * 1024 * 1024
+FETCH_JOBS = 8
+SCRYPT_PARAMS = {"n": 2 ** 14, "r": 8, "p": 1, "dklen": 32}
+
+
+class SyncError(RuntimeError):
+    """The sync session failed (peer error, auth failure or protocol violation)."""
+
+
+class ConnectionClosed(SyncError):
+    """The peer closed the stream."""
+
+
+def _bucket(name: str) -> str:
+    return hashlib.sha256(name.encode("utf-8")).hexdigest()[:TREE_DEPTH]
+
+
+def _digest(parts: List[str]) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()[:DIGEST_HEX]
+
+
+class DigestTree:
+    """Hierarchical digest of index entries; only non-empty nodes are stored."""
+
+    def __init__(self, entries: Dict[str, IndexEntry]):
+        self.leaves: Dict[str, Dict[str, IndexEntry]] = {}
+        for name, entry in entries.items():
+            self.leaves.setdefault(_bucket(name), {})[name] = entry
+        self._children: Dict[str, Dict[str, str]] = {}
+        level = {
+            prefix: _digest([f"{n}\0{v}\0{o}\0{int(d)}" for n, (v, o, d) in sorted(bucket.items())])
+            for prefix, bucket in self.leaves.items()
+        }
+        for depth in range(TREE_DEPTH - 1, -1, -1):
+            for prefix, digest in level.items():
+                self._children.setdefault(prefix[:depth], {})[prefix] = digest
+            level = {
+                parent: _digest([f"{c}:{d}" for c, d in sorted(kids.items())])
+                for parent, kids in self._children.items()
+                if len(parent) == depth
+            }
+        self.root = level.get("", "")
+
+    def children(self, prefix: str) -> Dict[str, str]:
+        return self._children.get(prefix, {})
+
+    def leaf_entries(self, prefixes: List[str]) -> Dict[str, IndexEntry]:
+        found: Dict[str, IndexEntry] = {}
+        for prefix in prefixes:
+            found.update(self.leaves.get(prefix, {}))
+        return found
+
+
+class VaultReplica:
+    """A vault as seen by the sync protocol; defaults to the ``vaultbuddy.storage`` one."""
+
+    def __init__(self, vault: Optional[Vault] = None):
+        self.vault = vault or storage.default_vault()
+
+    def entries(self) -> Dict[str, IndexEntry]:
+        # Long-running servers see writes other processes made since the last session
+        self.vault.refresh()
+        return self.vault.index_entries()[1]
+
+    def deadlines(self) -> Dict[str, int]:
+        return self.vault.index_deadlines()
+
+    def fetch(self, names: List[str]) -> Dict[str, Optional[str]]:
+        if not names:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(FETCH_JOBS, len(names))) as pool:
+            return dict(zip(names, pool.map(self.vault.get_secret, names), strict=True))
+
+    def apply(self, entries: List[Dict[str, object]]) -> int:
+        """Applies synced entries in one crash-safe batch; stale ones are skipped."""
+        entries = _incoming(entries)
+        with self.vault.transaction() as txn:
+            for e in entries:
+                version = (int(e["v"]), str(e["o"]))
+                deadline = e.get("x")
+                if e.get("d"):
+                    txn.delete(str(e["n"]), version=version, purge_at=deadline)
+                else:
+                    txn.store(str(e["n"]), str(e["s"]), version=version, expires_at=deadline)
+        return len(entries)
+
+
+def _aesgcm_class():
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    except ImportError as exc:
+        raise SyncError(
+            "The 'cryptography' package is required for sync. "
+            "Install with 'pip install vaultbuddy[sync]'."
+        ) from exc
+    return AESGCM
+
+
+def require_cryptography() -> None:
+    """Fails early, before any peer is contacted, if sync cannot encrypt."""
+    _aesgcm_class()
+
+
+def _aesgcm(key: bytes):
+    return _aesgcm_class()(key)
+
+
+class Channel:
+    """Length-prefixed JSON messages over a byte stream, encrypted after the handshake."""
+
+    def __init__(self, reader: BinaryIO, writer: BinaryIO):
+        self._reader = reader
+        self._writer = writer
+        self._send_aead = None
+        self._recv_aead = None
+        self._send_seq = 0
+        self._recv_seq = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.round_trips = 0
+
+    def _write_frame(self, payload: bytes) -> None:
+        self._writer.write(struct.pack(">I", len(payload)) + payload)
+        self._writer.flush()
+        self.bytes_sent += 4 + len(payload)
+
+    def _read_exact(self, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            chunk = self._reader.read(size - len(data))
+            if not chunk:
+                raise ConnectionClosed("Connection closed by peer (wrong passphrase?)")
+            data += chunk
+        return data
+
+    def _read_frame(self) -> bytes:
+        (size,) = struct.unpack(">I", self._read_exact(4))
+        if size > MAX_FRAME:
+            raise SyncError("Peer sent an oversized message")
+        self.bytes_received += 4 + size
+        return self._read_exact(size)
+
+    def _derive(self, passphrase: str, salt: bytes, client_nonce: bytes, server_nonce: bytes,
+                is_client: bool) -> None:
+        master = hashlib.scrypt(passphrase.encode("utf-8"), salt=salt, **SCRYPT_PARAMS)
+        c2s = hmac.new(master, b"c2s" + client_nonce + server_nonce, hashlib.sha256).digest()
+        s2c = hmac.new(master, b"s2c" + client_nonce + server_nonce, hashlib.sha256).digest()
+        self._send_aead = _aesgcm(c2s if is_client else s2c)
+        self._recv_aead = _aesgcm(s2c if is_client else c2s)
+
+    def _read_hello(self) -> Dict[str, object]:
+        try:
+            hello = json.loads(self._read_frame())
+        except ValueError as exc:
+            raise SyncError("Peer sent a malformed handshake") from exc
+        if not isinstance(hello, dict) or hello.get("proto") != PROTOCOL:
+            raise SyncError(f"Peer does not speak {PROTOCOL}")
+        return hello
+
+    def handshake_client(self, passphrase: str) -> None:
+        require_cryptography()
+        salt, nonce = secrets.token_bytes(16), secrets.token_bytes(16)
+        hello = {"proto": PROTOCOL, "salt": salt.hex(), "nonce": nonce.hex()}
+        self._write_frame(json.dumps(hello).encode())
+        reply = self._read_hello()
+        try:
+            server_nonce = bytes.fromhex(str(reply["nonce"]))
+        except (KeyError, ValueError) as exc:
+            raise SyncError("Peer sent a malformed handshake") from exc
+        self._derive(passphrase, salt, nonce, server_nonce, is_client=True)
+
+    def handshake_server(self, passphrase: str) -> None:
+        require_cryptography()
+        hello = self._read_hello()
+        try:
+            salt = bytes.fromhex(str(hello["salt"]))
+            client_nonce = bytes.fromhex(str(hello["nonce"]))
+        except (KeyError, ValueError) as exc:
+            raise SyncError("Peer sent a malformed handshake") from exc
+        nonce = secrets.token_bytes(16)
+        self._write_frame(json.dumps({"proto": PROTOCOL, "nonce": nonce.hex()}).encode())
+        self._derive(passphrase, salt, client_nonce, nonce, is_client=False)
+
+    def send(self, message: Dict[str, object]) -> None:
+        plaintext = json.dumps(message, separators=(",", ":")).encode("utf-8")
+        nonce = struct.pack(">4xQ", self._send_seq)
+        self._send_seq += 1
+        self._write_frame(self._send_aead.encrypt(nonce, plaintext, None))
+
+    def recv(self) -> Dict[str, object]:
+        frame = self._read_frame()
+        nonce = struct.pack(">4xQ", self._recv_seq)
+        self._recv_seq += 1
+        try:
+            plaintext = self._recv_aead.decrypt(nonce, frame, None)
+        except Exception as exc:
+            raise SyncError(
+                "Message authentication failed (wrong passphrase or tampered stream)"
+            ) from exc
+        try:
+            message = json.loads(plaintext)
+        except ValueError as exc:
+            raise SyncError("Peer sent a malformed message") from exc
+        if not isinstance(message, dict):
+            raise SyncError("Peer sent a malformed message")
+        return message
+
+    def request(self, message: Dict[str, object]) -> Dict[str, object]:
+        self.send(message)
+        reply = self.recv()
+        self.round_trips += 1
+        if "error" in reply:
+            raise SyncError(f"Peer error: {reply['error']}")
+        return reply
+
+
+def _wire(
+    name: str, entry: IndexEntry, value: Optional[str] = None, deadline: Optional[int] = None
+) -> Dict[str, object]:
+    version, origin, deleted = entry
+    message: Dict[str, object] = {"n": name, "v": version, "o": origin, "d": deleted}
+    if value is not None:
+        message["s"] = value
+    if deadline is not None:
+        # Expiry of a secret, or purge time of a tombstone, so peers agree on both
+        message["x"] = deadline
+    return message
+
+
+def _check_name(name: object) -> str:
+    if not isinstance(name, str):
+        raise SyncError("Peer sent a malformed entry name")
+    is_valid, error_msg = validate_secret_name(name)
+    if not is_valid:
+        raise SyncError(f"Peer sent an invalid secret name: {error_msg}")
+    if name == INDEX_USERNAME or name.startswith(WAL_USERNAME_PREFIX):
+        raise SyncError("Peer sent a reserved entry name")
+    return name
+
+
+def _incoming(entries: object) -> List[Dict[str, object]]:
+    """Validates wire entries from the peer before anything is applied."""
+    if not isinstance(entries, list):
+        raise SyncError("Peer sent malformed entries")
+    checked = []
+    for e in entries:
+        if not isinstance(e, dict):
+            raise SyncError("Peer sent a malformed entry")
+        name = _check_name(e.get("n"))
+        version, origin, deleted = e.get("v"), e.get("o"), e.get("d", False)
+        if isinstance(version, bool) or not isinstance(version, int) or version < 0:
+            raise SyncError(f"Peer sent a malformed version for {name!r}")
+        if not isinstance(origin, str) or not origin or any(c in origin for c in "\t\r\n"):
+            raise SyncError(f"Peer sent a malformed origin for {name!r}")
+        if not isinstance(deleted, bool):
+            raise SyncError(f"Peer sent a malformed deletion flag for {name!r}")
+        if not deleted and not isinstance(e.get("s"), str):
+            raise SyncError(f"Peer sent no value for {name!r}")
+        deadline = e.get("x")
+        if deadline is not None and (
+            isinstance(deadline, bool) or not isinstance(deadline, int) or deadline < 0
+        ):
+            raise SyncError(f"Peer sent a malformed deadline for {name!r}")
+        checked.append(e)
+    return checked
+
+
+def _with_values(replica, entries: Dict[str, IndexEntry]) -> List[Dict[str, object]]:
+    """Wire entries for ``entries``; live entries whose value vanished are skipped."""
+    values = replica.fetch([n for n, e in entries.items() if not e[2]])
+    deadlines = replica.deadlines()
+    out = []
+    for name, entry in entries.items():
+        if entry[2]:
+            out.append(_wire(name, entry, deadline=deadlines.get(name)))
+        elif values.get(name) is not None:
+            out.append(_wire(name, entry, values[name], deadlines.get(name)))
+    return out
+
+
+class SyncReport:
+    def __init__(self, pulled: int, pushed: int, channel: Channel):
+        self.pulled = pulled
+        self.pushed = pushed
+        self.bytes_sent = channel.bytes_sent
+        self.bytes_received = channel.bytes_received
+        self.round_trips = channel.round_trips
+
+
+def _remote_nodes(reply: Dict[str, object]) -> Dict[str, Dict[str, str]]:
+    try:
+        nodes = reply["nodes"].items()
+        return {str(p): {str(c): str(d) for c, d in kids.items()} for p, kids in nodes}
+    except (KeyError, AttributeError, TypeError) as exc:
+        raise SyncError("Peer sent a malformed 'nodes' reply") from exc
+
+
+def _remote_entries(reply: Dict[str, object]) -> Dict[str, IndexEntry]:
+    try:
+        return {
+            str(n): (int(v), str(o), bool(d)) for n, (v, o, d) in reply["entries"].items()
+        }
+    except (KeyError, AttributeError, TypeError, ValueError) as exc:
+        raise SyncError("Peer sent a malformed 'entries' reply") from exc
+
+
+def sync_client(channel: Channel, replica, passphrase: str) -> SyncReport:
+    """Runs the client side of a session: find differences, then pull and push them."""
+    channel.handshake_client(passphrase)
+    channel.round_trips += 1
+    local = DigestTree(replica.entries())
+
+    frontier = [""]
+    for _ in range(TREE_DEPTH):
+        remote = _remote_nodes(channel.request({"op": "nodes", "prefixes": frontier}))
+        differing = []
+        for prefix in frontier:
+            mine, theirs = local.children(prefix), remote.get(prefix, {})
+            changed = sorted(set(mine) | set(theirs))
+            differing.extend(c for c in changed if mine.get(c) != theirs.get(c))
+        frontier = differing
+        if not frontier:
+            break
+
+    want: List[str] = []
+    push: Dict[str, IndexEntry] = {}
+    if frontier:
+        theirs = _remote_entries(channel.request({"op": "entries", "prefixes": frontier}))
+        mine = local.leaf_entries(frontier)
+        for name in sorted(set(mine) | set(theirs)):
+            m, t = mine.get(name), theirs.get(name)
+            if t is not None and (m is None or t[:2] > m[:2]):
+                want.append(name)
+            elif m is not None and (t is None or m[:2] > t[:2]):
+                push[name] = m
+
+    pulled: List[Dict[str, object]] = []
+    if want or push:
+        outgoing = _with_values(replica, push)
+        reply = channel.request({"op": "exchange", "want": want, "push": outgoing})
+        pulled = _incoming(reply.get("entries"))
+        replica.apply(pulled)
+    channel.send({"op": "bye"})
+    return SyncReport(len(pulled), len(push), channel)
+
+
+def serve_session(channel: Channel, replica, passphrase: str) -> None:
+    """Answers one client session until it says goodbye or disconnects.
+
+    Raises SyncError if the client misbehaves; nothing from a rejected
+    request is applied.
+    """
+    channel.handshake_server(passphrase)
+    tree: Optional[DigestTree] = None
+    while True:
+        try:
+            message = channel.recv()
+        except ConnectionClosed:
+            return
+        op = message.get("op")
+        if op == "bye":
+            return
+        if tree is None:
+            tree = DigestTree(replica.entries())
+        try:
+            if op == "nodes":
+                channel.send({"nodes": {p: tree.children(p) for p in message["prefixes"]}})
+            elif op == "entries":
+                found = tree.leaf_entries(list(message["prefixes"]))
+                channel.send({"entries": {n: list(e) for n, e in found.items()}})
+            elif op == "exchange":
+                push = _incoming(message.get("push"))
+                wanted = {n: tree.leaves.get(_bucket(n), {}).get(n) for n in message["want"]}
+                reply = _with_values(replica, {n: e for n, e in wanted.items() if e is not None})
+                replica.apply(push)
+                tree = None
+                channel.send({"entries": reply})
+            else:
+                channel.send({"error": f"unknown op {op!r}"})
+        except (KeyError, TypeError, ValueError, AttributeError) as exc:
+            channel.send({"error": "malformed request"})
+            raise SyncError(f"Peer sent a malformed {op!r} request") from exc
+        except SyncError as exc:
+            channel.send({"error": str(exc)})
+            raise
+
+
+def _require_unix_sockets() -> None:
+    if not hasattr(socket, "AF_UNIX"):
+        raise SyncError("Unix domain sockets are not available on this platform; use --command")
+
+
+def _hang_up(sock: socket.socket) -> None:
+    # makefile() objects keep the descriptor alive; shutdown makes the peer see EOF now.
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+def connect_socket(path: str) -> Tuple[Channel, socket.socket]:
+    _require_unix_sockets()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    return Channel(sock.makefile("rb"), sock.makefile("wb")), sock
+
+
+def serve_socket(path: str, replica, passphrase: str, once: bool = False) -> None:
+    """Serves sessions on a Unix socket only the current user can connect to."""
+    _require_unix_sockets()
+    try:
+        if not stat.S_ISSOCK(os.lstat(path).st_mode):
+            raise SyncError(f"{path} exists and is not a socket; refusing to replace it")
+        os.unlink(path)  # left behind by a server that did not shut down cleanly
+    except FileNotFoundError:
+        pass
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(old_umask)
+    server.listen(1)
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                try:
+                    channel = Channel(conn.makefile("rb"), conn.makefile("wb"))
+                    serve_session(channel, replica, passphrase)
+                except SyncError:
+                    if once:
+                        raise
+                finally:
+                    _hang_up(conn)
+            if once:
+                return
+    finally:
+        server.close()
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def spawn_command(command: List[str]) -> Tuple[Channel, subprocess.Popen]:
+    """Starts ``command`` (e.g. ``ssh host vaultbuddy sync serve --stdio``) as the peer."""
+    proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)  # nosec B603
+    return Channel(proc.stdout, proc.stdin), proc
+
+
+def stop_command(proc: subprocess.Popen, timeout: float = 5.0) -> None:
+    """Closes the peer's stdin and waits for it, terminating it if it does not exit."""
+    proc.stdin.close()
+    try:
+        proc.wait(timeout)
+        return
+    except subprocess.TimeoutExpired:
+        proc.terminate()
+    try:
+        proc.wait(timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
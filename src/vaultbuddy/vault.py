@@ -0,0 +1,681 @@
+"""
+A vault session: one backend handle plus the index state built on top of it.
+
+``Vault`` owns everything that used to be module-level in ``vaultbuddy.storage``
+(backend call policy, cached index, transaction state, audit log), so several
+isolated vaults can run side by side in one process::
+
+    from vaultbuddy.backends import MemoryBackend
+    from vaultbuddy.vault import Vault
+
+    vault = Vault(MemoryBackend())
+    vault.store_secret("db", "pw")
+"""
+
+import heapq
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Iterator, List, Optional, Set, Tuple
+
+from . import wal
+from .audit import AuditLog
+from .backends import (
+    Backend,
+    InitError,
+    KeyringBackend,
+    KeyringLocked,
+    PasswordDeleteError,
+    PasswordSetError,
+    classify_backend,
+)
+from .completion import write_name_cache
+from .paths import file_lock
+from .resilience import (
+    DEFAULT_BREAKER_COOLDOWN,
+    DEFAULT_BREAKER_THRESHOLD,
+    BackendError,
+    CircuitBreaker,
+    ResilientCaller,
+)
+
+SERVICE_NAME = "VaultBuddy"
+INDEX_USERNAME = "__index__"
+# Hidden backend entries holding the staged values of an in-flight batch.
+WAL_USERNAME_PREFIX = "__wal__:"
+
+_TRUTHY = {"1", "true", "True", "yes", "YES"}
+
+# How long a tombstone is kept for sync before sweep() purges it. A replica that
+# stays offline longer may bring the deleted secret back on its next sync.
+DEFAULT_TOMBSTONE_GRACE = 30 * 24 * 3600
+
+# Errors a healthy backend may still raise transiently (D-Bus hiccups, races creating
+# the collection); "not found" on delete is an answer, not a failure.
+_TRANSIENT_ERRORS = (InitError, PasswordSetError, OSError)
+
+
+def _tombstone_grace() -> float:
+    try:
+        return float(os.getenv("VAULTBUDDY_TOMBSTONE_GRACE", DEFAULT_TOMBSTONE_GRACE))
+    except ValueError:
+        return float(DEFAULT_TOMBSTONE_GRACE)
+
+
+def _new_caller(**options) -> ResilientCaller:
+    return ResilientCaller(
+        transient=_TRANSIENT_ERRORS,
+        passthrough=(PasswordDeleteError,),
+        fatal=(KeyringLocked,),
+        **options,
+    )
+
+
+INDEX_HEADER = "#vaultbuddy-index v2"
+
+# (version, origin replica, deleted) — ordered so that max() picks the sync winner
+IndexEntry = Tuple[int, str, bool]
+# (version, origin replica) of a synced entry
+Version = Tuple[int, str]
+
+
+class Index:
+    """Parsed index: secret names with the per-entry versions used by sync.
+
+    Each local write bumps an entry's version and stamps it with this vault's
+    replica id; the higher ``(version, origin)`` wins when vaults are synced.
+    Deleted names stay as tombstones so deletions propagate too. Indexes written
+    before versioning (plain newline-separated names) load as version 0.
+
+    Entries may carry a deadline (epoch seconds): for a secret it is its expiry,
+    for a tombstone the time it may be purged. Deadlines are kept in a
+    name -> deadline map for lookups plus a min-heap for sweeping; heap pairs
+    whose deadline no longer matches the map are stale and skipped when popped.
+    """
+
+    def __init__(
+        self,
+        replica: str,
+        entries: Dict[str, IndexEntry],
+        deadlines: Optional[Dict[str, int]] = None,
+    ):
+        self.replica = replica
+        self.entries = entries
+        self.deadlines: Dict[str, int] = deadlines or {}
+        self._heap = [(deadline, name) for name, deadline in self.deadlines.items()]
+        heapq.heapify(self._heap)
+
+    @classmethod
+    def parse(cls, data: Optional[str]) -> "Index":
+        lines = (data or "").split("\n")
+        if not lines[0].startswith(INDEX_HEADER):
+            legacy = {n.strip(): (0, "", False) for n in lines if n.strip()}
+            return cls(uuid.uuid4().hex[:12], legacy)
+        replica = lines[0][len(INDEX_HEADER):].strip() or uuid.uuid4().hex[:12]
+        entries: Dict[str, IndexEntry] = {}
+        deadlines: Dict[str, int] = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, version, origin, flags, deadline = (line.split("\t") + ["", "", "", ""])[:5]
+            entries[name] = (int(version or 0), origin, flags == "d")
+            if deadline:
+                deadlines[name] = int(deadline)
+        return cls(replica, entries, deadlines)
+
+    def serialize(self) -> str:
+        lines = [f"{INDEX_HEADER} {self.replica}"]
+        for name in sorted(self.entries):
+            version, origin, deleted = self.entries[name]
+            fields = [name, str(version), origin]
+            if deleted or name in self.deadlines:
+                fields.append("d" if deleted else "")
+            if name in self.deadlines:
+                # Trailing column, so readers that only know four fields ignore it
+                fields.append(str(self.deadlines[name]))
+            lines.append("\t".join(fields))
+        return "\n".join(lines)
+
+    def names(self) -> Set[str]:
+        return {n for n, (_, _, deleted) in self.entries.items() if not deleted}
+
+    def touch(self, name: str, expires_at: Optional[int] = None) -> None:
+        """Records a local write; a write without ``expires_at`` makes the secret permanent."""
+        version = self.entries.get(name, (0, "", False))[0]
+        self.entries[name] = (version + 1, self.replica, False)
+        self.set_deadline(name, expires_at)
+
+    def remove(self, name: str, purge_at: Optional[int] = None) -> None:
+        """Turns a secret into a tombstone that ``purge_at`` allows sweeping away."""
+        entry = self.entries.get(name)
+        if entry is not None and not entry[2]:
+            self.entries[name] = (entry[0] + 1, self.replica, True)
+            self.set_deadline(name, purge_at)
+
+    def purge(self, name: str) -> None:
+        self.entries.pop(name, None)
+        self.deadlines.pop(name, None)
+
+    def set_deadline(self, name: str, deadline: Optional[int]) -> None:
+        if deadline is None:
+            self.deadlines.pop(name, None)
+            return
+        self.deadlines[name] = deadline
+        heapq.heappush(self._heap, (deadline, name))
+
+    def is_expired(self, name: str, now: float) -> bool:
+        deadline = self.deadlines.get(name)
+        return deadline is not None and deadline <= now
+
+    def pop_due(self, now: float) -> List[str]:
+        """Removes and returns names whose deadline has passed, earliest first."""
+        due: List[str] = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, name = heapq.heappop(self._heap)
+            if self.deadlines.get(name) == deadline:
+                del self.deadlines[name]
+                due.append(name)
+        return due
+
+    def is_newer(self, name: str, version: int, origin: str) -> bool:
+        current = self.entries.get(name)
+        return current is None or (version, origin) > current[:2]
+
+    def put(
+        self, name: str, version: int, origin: str, deleted: bool, deadline: Optional[int] = None
+    ) -> None:
+        self.entries[name] = (version, origin, deleted)
+        self.set_deadline(name, deadline)
+
+
+class Transaction:
+    """Operations staged in memory until the enclosing ``transaction()`` exits.
+
+    Repeated operations on the same name collapse to the last one, so a batch
+    costs one backend write per distinct name plus a single index commit.
+    """
+
+    def __init__(self, vault: "Vault", names: Set[str]):
+        self.txid = uuid.uuid4().hex
+        self.vault = vault
+        self.names = names
+        # name -> (value to store or None to delete, explicit sync version or None,
+        # deadline or None); insertion order is apply order
+        self._staged: Dict[str, Tuple[Optional[str], Optional[Version], Optional[int]]] = {}
+
+    def _stage(
+        self,
+        name: str,
+        value: Optional[str],
+        version: Optional[Version],
+        deadline: Optional[int] = None,
+    ) -> None:
+        self._staged.pop(name, None)
+        self._staged[name] = (value, version, deadline)
+
+    def store(
+        self,
+        name: str,
+        value: str,
+        version: Optional[Version] = None,
+        expires_at: Optional[float] = None,
+    ) -> None:
+        """Stages a write; ``version`` carries a synced entry's version instead of bumping it."""
+        self._stage(name, value, version, None if expires_at is None else int(expires_at))
+        self.names.add(name)
+
+    def delete(
+        self, name: str, version: Optional[Version] = None, purge_at: Optional[int] = None
+    ) -> bool:
+        """Stages a delete; ``purge_at`` carries a synced tombstone's purge deadline."""
+        existed = name in self.names
+        self._stage(name, None, version, purge_at)
+        self.names.discard(name)
+        return existed
+
+    def get(self, name: str) -> Optional[str]:
+        if name in self._staged:
+            value = self._staged[name][0]
+            return None if self.is_expired(name, time.time()) else value
+        return self.vault._get_live(name)
+
+    def is_expired(self, name: str, now: float) -> bool:
+        """Staged deadlines win over the committed index's."""
+        if name in self._staged:
+            deadline = self._staged[name][2]
+            return deadline is not None and deadline <= now
+        return self.vault._index().is_expired(name, now)
+
+    def __len__(self) -> int:
+        return len(self._staged)
+
+
+class Vault:
+    """Secrets stored in one backend under one service name.
+
+    The backend handle, call policy and parsed index are held for the vault's
+    lifetime. Reads are answered from the cached index; every write re-reads
+    the index first, so a long-lived session does not overwrite updates other
+    sessions made in the meantime. Call :meth:`refresh` to make reads pick up
+    those changes too.
+
+    ``index_lock`` names a lock file held around each index read-modify-write;
+    sessions in other processes that share it cannot lose each other's index
+    updates. Without it, re-reading only narrows that window.
+
+    ``wal_path`` enables the crash journal for batches; without it batches are
+    still applied with a single index commit but are not recoverable after a
+    crash. ``name_cache`` keeps the shell-completion cache in sync.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[Backend] = None,
+        service: str = SERVICE_NAME,
+        wal_path: Optional[str] = None,
+        name_cache: bool = False,
+        index_lock: Optional[str] = None,
+    ):
+        self.backend: Backend = backend if backend is not None else KeyringBackend()
+        self.service = service
+        self.wal_path = wal_path
+        self.name_cache = name_cache
+        self.index_lock = index_lock
+        self.tombstone_grace = _tombstone_grace()
+        self.audit: Optional[AuditLog] = None
+        self._caller = _new_caller()
+        self._index_cache: Optional[Index] = None
+        self._lock = threading.RLock()
+        self._local = threading.local()
+
+    # Lifecycle
+
+    def open(self, allow_insecure_backend: bool = False) -> "Vault":
+        """Checks the backend, ensures the index exists and recovers interrupted batches.
+
+        An insecure backend is refused unless allowed via flag or environment
+        variable ``VAULTBUDDY_ALLOW_INSECURE``.
+        """
+        allow_env = os.getenv("VAULTBUDDY_ALLOW_INSECURE", "").strip()
+        allow_flag = allow_insecure_backend or allow_env in _TRUTHY
+        secure, info, reason = self.is_secure()
+        if not secure and not allow_flag:
+            raise RuntimeError(
+                (
+                    "Insecure or unsupported keyring backend detected: "
+                    f"{info}. Refusing to continue.\nReason: {reason}\n"
+                    "Set env VAULTBUDDY_ALLOW_INSECURE=1 or pass --allow-insecure-backend "
+                    "to override (NOT RECOMMENDED)."
+                )
+            )
+        audit_env = os.getenv("VAULTBUDDY_AUDIT", "").strip()
+        if self.audit is None and (audit_env in _TRUTHY or os.getenv("VAULTBUDDY_AUDIT_LOG")):
+            self.enable_audit()
+        self.refresh()
+        self._ensure_index()
+        self.recover_pending()
+        return self
+
+    def close(self) -> None:
+        """Flushes the audit log; the backend handle needs no cleanup."""
+        self.disable_audit()
+
+    def is_secure(self) -> Tuple[bool, str, str]:
+        """Returns (is_secure, identity, reason) for this vault's backend.
+
+        Resolving the keyring may already talk to D-Bus, so it runs under the
+        call policy too; timeouts and an open breaker propagate.
+        """
+        try:
+            module_path, class_name = self._caller.call(self.backend.identity)
+        except BackendError:
+            raise
+        except Exception:
+            module_path, class_name = "unknown", "Unknown"
+        return classify_backend(module_path, class_name)
+
+    def configure(
+        self,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        breaker_threshold: Optional[int] = None,
+        breaker_cooldown: Optional[float] = None,
+    ) -> None:
+        """Replaces the backend call policy; unset options fall back to env/defaults."""
+        options: Dict[str, object] = {"timeout": timeout, "retries": retries}
+        if breaker_threshold is not None or breaker_cooldown is not None:
+            options["breaker"] = CircuitBreaker(
+                DEFAULT_BREAKER_THRESHOLD if breaker_threshold is None else breaker_threshold,
+                DEFAULT_BREAKER_COOLDOWN if breaker_cooldown is None else breaker_cooldown,
+            )
+        self._caller = _new_caller(**options)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for backend calls, retries, timeouts and circuit-breaker events."""
+        return self._caller.stats()
+
+    def enable_audit(self, path: Optional[str] = None, **options) -> AuditLog:
+        """Starts recording operations to an audit log (see ``vaultbuddy.audit``)."""
+        self.disable_audit()
+        self.audit = AuditLog(path, **options)
+        return self.audit
+
+    def disable_audit(self) -> None:
+        """Flushes and stops the audit log, if one is active."""
+        log, self.audit = self.audit, None
+        if log is not None:
+            log.close()
+
+    def _audit_event(self, op: str, name: str, ok: bool = True) -> None:
+        log = self.audit
+        if log is not None:
+            log.record(op, name, ok)
+
+    # Every backend call goes through these three helpers.
+
+    def _get(self, username: str) -> Optional[str]:
+        return self._caller.call(self.backend.get_password, self.service, username)
+
+    def _set(self, username: str, value: str) -> None:
+        self._caller.call(self.backend.set_password, self.service, username, value)
+
+    def _delete(self, username: str) -> None:
+        self._caller.call(self.backend.delete_password, self.service, username)
+
+    # Index
+
+    def refresh(self) -> None:
+        """Drops the cached index so the next operation re-reads it from the backend."""
+        with self._lock:
+            self._index_cache = None
+
+    def _ensure_index(self) -> None:
+        with self._lock, self._interprocess_lock():
+            data = self._get(INDEX_USERNAME)
+            self._index_cache = Index.parse(data)
+            if data is None:
+                self._set(INDEX_USERNAME, self._index_cache.serialize())
+
+    def _index(self) -> Index:
+        """The cached index; only for reads."""
+        with self._lock:
+            if self._index_cache is None:
+                self._index_cache = Index.parse(self._get(INDEX_USERNAME))
+            return self._index_cache
+
+    def _interprocess_lock(self) -> ContextManager[bool]:
+        return nullcontext(True) if self.index_lock is None else file_lock(self.index_lock)
+
+    @contextmanager
+    def _updating_index(self) -> Iterator[Index]:
+        """Re-reads the index for a write and holds the locks until it is saved."""
+        with self._lock, self._interprocess_lock():
+            self._index_cache = Index.parse(self._get(INDEX_USERNAME))
+            yield self._index_cache
+
+    def _save_index(self, index: Index) -> None:
+        try:
+            self._set(INDEX_USERNAME, index.serialize())
+        except BaseException:
+            self._index_cache = None  # the backend copy is authoritative again
+            raise
+        self.refresh_name_cache(index.names())
+
+    def _purge_at(self, now: Optional[float] = None) -> int:
+        return int((time.time() if now is None else now) + self.tombstone_grace)
+
+    def index_deadlines(self) -> Dict[str, int]:
+        """Returns the expiry (secrets) and purge (tombstones) deadlines by name."""
+        with self._lock:
+            return dict(self._index().deadlines)
+
+    def index_entries(self) -> Tuple[str, Dict[str, IndexEntry]]:
+        """Returns the replica id and all index entries, tombstones included."""
+        with self._lock:
+            index = self._index()
+            return index.replica, dict(index.entries)
+
+    def refresh_name_cache(self, names: Optional[Set[str]] = None) -> None:
+        """Rewrites the shell-completion name cache; never fails a vault operation."""
+        if not self.name_cache:
+            return
+        try:
+            write_name_cache(self._index().names() if names is None else names)
+        except OSError:
+            pass
+
+    # Secrets
+
+    def store_secret(self, name: str, value: str, expires_at: Optional[float] = None) -> None:
+        """Stores a secret and updates the index.
+
+        ``expires_at`` (epoch seconds) makes the secret read as missing from then
+        on; :meth:`sweep` removes it from the backend.
+        """
+        txn = self._current_transaction()
+        if txn is not None:
+            txn.store(name, value, expires_at=expires_at)
+            return
+        self._set(name, value)
+        with self._updating_index() as index:
+            index.touch(name, None if expires_at is None else int(expires_at))
+            self._save_index(index)
+        self._audit_event("set", name)
+
+    def _get_live(self, name: str) -> Optional[str]:
+        # Expired entries are answered from the cached index, without a backend call
+        with self._lock:
+            expired = self._index().is_expired(name, time.time())
+        return None if expired else self._get(name)
+
+    def get_secret(self, name: str) -> Optional[str]:
+        """Retrieves a secret by name; expired secrets read as missing."""
+        txn = self._current_transaction()
+        value = txn.get(name) if txn is not None else self._get_live(name)
+        self._audit_event("get", name, value is not None)
+        return value
+
+    def list_secrets(self) -> List[str]:
+        """Lists all stored, unexpired secret names from the index."""
+        txn = self._current_transaction()
+        now = time.time()
+        with self._lock:
+            if txn is not None:
+                return sorted(n for n in txn.names if not txn.is_expired(n, now))
+            index = self._index()
+            return sorted(n for n in index.names() if not index.is_expired(n, now))
+
+    def sweep(self, now: Optional[float] = None) -> List[str]:
+        """Deletes expired secrets with a single index update; returns their names.
+
+        Only due entries are popped from the deadline heap, so the backend work is
+        proportional to the number of expired secrets, not the vault size. Expired
+        secrets become tombstones; tombstones past their grace period are purged.
+        """
+        if self._current_transaction() is not None:
+            raise RuntimeError("sweep() cannot run inside a transaction")
+        now = time.time() if now is None else now
+        expired: List[str] = []
+        with self._updating_index() as index:
+            due = index.pop_due(now)
+            if not due:
+                return []
+            try:
+                for name in due:
+                    if index.entries[name][2]:
+                        index.purge(name)
+                        continue
+                    try:
+                        self._delete(name)
+                    except PasswordDeleteError:
+                        pass  # already gone, e.g. a sweep interrupted before its index update
+                    index.remove(name, self._purge_at(now))
+                    self._audit_event("expire", name)
+                    expired.append(name)
+                self._save_index(index)
+            except BaseException:
+                self._index_cache = None  # the backend copy is authoritative again
+                raise
+        return expired
+
+    def delete_secret(self, name: str) -> bool:
+        """Deletes a secret by name and updates the index."""
+        txn = self._current_transaction()
+        if txn is not None:
+            return txn.delete(name)
+        try:
+            self._delete(name)
+        except PasswordDeleteError:
+            self._audit_event("delete", name, False)
+            return False
+        with self._updating_index() as index:
+            if name in index.names():
+                index.remove(name, self._purge_at())
+                self._save_index(index)
+        self._audit_event("delete", name)
+        return True
+
+    # Batches
+
+    def _current_transaction(self) -> Optional[Transaction]:
+        return getattr(self._local, "current", None)
+
+    @contextmanager
+    def transaction(self) -> Iterator[Transaction]:
+        """Groups store/delete calls into one batch with a single index commit.
+
+        Inside the block, ``store_secret``/``delete_secret`` are staged and
+        ``get_secret``/``list_secrets`` see the staged state. Nothing is applied if
+        the block raises. Nested blocks join the outermost batch.
+        """
+        if self._current_transaction() is not None:
+            yield self._current_transaction()
+            return
+        self.recover_pending()
+        txn = Transaction(self, self._index().names())
+        self._local.current = txn
+        try:
+            yield txn
+        finally:
+            self._local.current = None
+        self._commit(txn)
+
+    def _commit(self, txn: Transaction) -> None:
+        if not txn._staged:
+            return
+        ops: List[Dict[str, object]] = []
+        values: Dict[str, str] = {}
+        for name, (value, version, deadline) in txn._staged.items():
+            op: Dict[str, object] = {"op": "set" if value is not None else "delete", "name": name}
+            if version is not None:
+                op["version"] = list(version)
+            if deadline is not None:
+                op["expires_at" if value is not None else "purge_at"] = deadline
+            ops.append(op)
+            if value is not None:
+                values[name] = value
+        if self.wal_path is None:
+            self._replay(txn.txid, ops, values)
+            return
+        # Held until the batch is applied, so recovery elsewhere leaves it alone
+        with wal.locked(txn.txid, self.wal_path):
+            # Log intent first so a crash while staging values can be rolled back.
+            wal.write_wal(txn.txid, wal.STATE_PENDING, ops, self.wal_path)
+            self._set(WAL_USERNAME_PREFIX + txn.txid, json.dumps(values))
+            wal.write_wal(txn.txid, wal.STATE_COMMITTED, ops, self.wal_path)
+            self._replay(txn.txid, ops, values)
+
+    def _replay(self, txid: str, ops: List[Dict[str, object]], values: Dict[str, str]) -> None:
+        """Applies a committed batch; safe to repeat after a crash at any point."""
+        with self._updating_index() as index:
+            try:
+                self._apply_ops(index, ops, values)
+            except BaseException:
+                self._index_cache = None  # partially applied; reload on the next call
+                raise
+        if self.wal_path is not None:
+            self._discard_staged_values(txid)
+            wal.clear_wal(txid, self.wal_path)
+
+    def _apply_ops(
+        self, index: Index, ops: List[Dict[str, object]], values: Dict[str, str]
+    ) -> None:
+        for op in ops:
+            name = str(op["name"])
+            version = op.get("version")
+            if version is not None and not index.is_newer(name, int(version[0]), str(version[1])):
+                continue  # a newer local write beats an incoming synced entry
+            purge_at = op.get("purge_at")
+            if name not in index.entries and purge_at is not None and int(purge_at) <= time.time():
+                continue  # a tombstone this vault already purged, or never needed
+            if op["op"] == "set":
+                if name not in values:
+                    continue
+                self._set(name, values[name])
+                expires_at = op.get("expires_at")
+                deadline = None if expires_at is None else int(expires_at)
+                if version is None:
+                    index.touch(name, deadline)
+                else:
+                    index.put(name, int(version[0]), str(version[1]), False, deadline)
+                self._audit_event("set", name)
+            else:
+                try:
+                    self._delete(name)
+                except PasswordDeleteError:
+                    pass
+                if version is None:
+                    index.remove(name, self._purge_at())
+                else:
+                    index.put(
+                        name,
+                        int(version[0]),
+                        str(version[1]),
+                        True,
+                        self._purge_at() if purge_at is None else int(purge_at),
+                    )
+                self._audit_event("delete", name)
+        self._save_index(index)
+
+    def _discard_staged_values(self, txid: str) -> None:
+        try:
+            self._delete(WAL_USERNAME_PREFIX + txid)
+        except PasswordDeleteError:
+            pass
+
+    def recover_pending(self) -> Optional[str]:
+        """Finishes or undoes batches interrupted by a crash.
+
+        Batches another process is still running are skipped. Returns
+        ``"replayed"`` or ``"rolled back"`` for the last batch recovered, else None.
+        """
+        if self.wal_path is None:
+            return None
+        outcome = None
+        for txid in wal.pending_txids(self.wal_path):
+            with wal.locked(txid, self.wal_path, blocking=False) as acquired:
+                if acquired:
+                    outcome = self._recover(txid) or outcome
+        return outcome
+
+    def _recover(self, txid: str) -> Optional[str]:
+        record = wal.read_wal(txid, self.wal_path)
+        if record is None:
+            # Finished between listing and locking; drop the stray lock file.
+            wal.clear_wal(txid, self.wal_path)
+            return None
+        if record["state"] == wal.STATE_PENDING:
+            # Crashed before the commit marker: nothing was applied yet.
+            self._discard_staged_values(txid)
+            wal.clear_wal(txid, self.wal_path)
+            return "rolled back"
+        staged = self._get(WAL_USERNAME_PREFIX + txid)
+        if staged is None:
+            # Staged values are only dropped after the index commit; just finish up.
+            wal.clear_wal(txid, self.wal_path)
+            return "replayed"
+        self._replay(txid, list(record.get("ops", [])), json.loads(staged))
+        return "replayed"
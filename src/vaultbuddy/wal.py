@@ -0,0 +1,83 @@
+"""
+Write-ahead log for multi-operation vault batches.
+
+The log records only operation kinds and secret names. Staged values are held
+in a single hidden keyring entry so no secret material ever touches the disk.
+
+Each batch gets its own record, ``<txid>.json``, in the log directory. The
+process running a batch holds an exclusive lock on ``<txid>.lock`` until the
+batch is applied, so recovery in another process can tell a batch that is
+still running from one whose process crashed.
+"""
+
+import json
+import os
+from typing import ContextManager, Dict, List, Optional
+
+from .paths import atomic_write, file_lock, state_path
+
+WAL_DIRNAME = "wal"
+
+STATE_PENDING = "pending"
+STATE_COMMITTED = "committed"
+
+
+def wal_path() -> str:
+    """Returns the default log directory."""
+    return state_path(WAL_DIRNAME)
+
+
+def _record_path(txid: str, path: Optional[str]) -> str:
+    return os.path.join(path or wal_path(), f"{txid}.json")
+
+
+def _lock_path(txid: str, path: Optional[str]) -> str:
+    return os.path.join(path or wal_path(), f"{txid}.lock")
+
+
+def locked(txid: str, path: Optional[str] = None, blocking: bool = True) -> ContextManager[bool]:
+    """Holds the batch's lock; yields False if ``blocking`` is off and another process has it."""
+    return file_lock(_lock_path(txid, path), blocking)
+
+
+def write_wal(
+    txid: str, state: str, ops: List[Dict[str, object]], path: Optional[str] = None
+) -> None:
+    """Durably records a batch; ``state`` is the commit marker."""
+    directory = path or wal_path()
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    payload = json.dumps({"txid": txid, "state": state, "ops": ops}, separators=(",", ":"))
+    atomic_write(_record_path(txid, path), [payload.encode("utf-8")])
+
+
+def read_wal(txid: str, path: Optional[str] = None) -> Optional[Dict[str, object]]:
+    """Returns the logged batch, or None if it is no longer in flight."""
+    record_path = _record_path(txid, path)
+    try:
+        with open(record_path, "rb") as fh:
+            record = json.loads(fh.read().decode("utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        raise RuntimeError(f"Write-ahead log at {record_path} is unreadable: {exc}") from exc
+    if record.get("state") not in {STATE_PENDING, STATE_COMMITTED} or record.get("txid") != txid:
+        raise RuntimeError(f"Write-ahead log at {record_path} is malformed.")
+    return record
+
+
+def pending_txids(path: Optional[str] = None) -> List[str]:
+    """Returns the ids of all logged batches, running or interrupted."""
+    try:
+        names = os.listdir(path or wal_path())
+    except FileNotFoundError:
+        return []
+    return sorted(n[: -len(".json")] for n in names if n.endswith(".json"))
+
+
+def clear_wal(txid: str, path: Optional[str] = None) -> None:
+    """Removes a finished batch's record and lock file."""
+    for target in (_record_path(txid, path), _lock_path(txid, path)):
+        try:
+            os.unlink(target)
+        except FileNotFoundError:
+            pass
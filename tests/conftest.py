@@ -0,0 +1,50 @@
+from typing import Dict
+
+import pytest
+
+from vaultbuddy import storage
+from vaultbuddy.storage import init_db
+
+
+class DummyKeyring:
+    """A minimal in-memory keyring backend for tests."""
+
+    __module__ = "keyring.backends.SecretService"
+    __name__ = "Dummy"
+
+    def __init__(self):
+        self._data: Dict[tuple[str, str], str] = {}
+
+    def get_password(self, service_name: str, username: str):
+        return self._data.get((service_name, username))
+
+    def set_password(self, service_name: str, username: str, password: str):
+        self._data[(service_name, username)] = password
+
+    def delete_password(self, service_name: str, username: str):
+        key = (service_name, username)
+        if key not in self._data:
+            import keyring
+            raise keyring.errors.PasswordDeleteError("not found")
+        del self._data[key]
+
+
+@pytest.fixture(autouse=True)
+def patch_keyring(monkeypatch, tmp_path):
+    import keyring
+
+    # Keep write-ahead logs and caches out of the real user profile
+    monkeypatch.setenv("VAULTBUDDY_HOME", str(tmp_path / "state"))
+
+    dummy = DummyKeyring()
+
+    def _get_keyring():
+        return dummy
+
+    monkeypatch.setattr(keyring, "get_keyring", _get_keyring)
+    # Fresh default vault (call policy, counters, cached index) resolving to the dummy
+    storage.set_default_vault(None)
+    # Ensure fresh index
+    init_db(allow_insecure_backend=True)
+    yield dummy
+    storage.set_default_vault(None)
@@ -0,0 +1,122 @@
+import json
+import threading
+
+from typer.testing import CliRunner
+
+from vaultbuddy import cli, storage
+from vaultbuddy.audit import AuditLog, log_files, tail, verify
+from vaultbuddy.storage import delete_secret, get_secret, store_secret
+
+
+def _log(tmp_path, **options):
+    options.setdefault("flush_interval", 60)
+    return AuditLog(str(tmp_path / "audit.log"), **options)
+
+
+def test_batches_are_hash_chained(tmp_path):
+    log = _log(tmp_path)
+    for i in range(5):
+        log.record("get", f"s{i}")
+    # Nothing hits the disk until the flusher (or close) runs
+    assert not (tmp_path / "audit.log").exists()
+    log.close()
+    assert verify(log.path) == (True, 5, "")
+    records = tail(log.path, 2)
+    assert [r["name"] for r in records] == ["s3", "s4"]
+    assert records[1]["prev"] == records[0]["hash"]
+
+
+def test_verify_detects_tampering_and_removal(tmp_path):
+    log = _log(tmp_path)
+    for i in range(4):
+        log.record("set", f"s{i}")
+    log.close()
+    path = tmp_path / "audit.log"
+    lines = path.read_text().splitlines(keepends=True)
+
+    path.write_text("".join(lines[:1] + lines[2:]))
+    ok, count, problem = verify(str(path))
+    assert not ok and count == 1 and "chain broken" in problem
+
+    edited = json.loads(lines[2])
+    edited["name"] = "other"
+    path.write_text("".join(lines[:2] + [json.dumps(edited) + "\n"] + lines[3:]))
+    ok, _, problem = verify(str(path))
+    assert not ok and "modified" in problem
+
+
+def test_rotation_keeps_chain_across_files(tmp_path):
+    log = _log(tmp_path, max_bytes=600, backups=3)
+    for i in range(30):
+        log.record("get", f"secret-{i}")
+        log.flush()
+    log.close()
+    files = log_files(log.path, backups=3)
+    assert len(files) == 4
+    ok, count, _ = verify(log.path, backups=3)
+    assert ok and 0 < count < 30
+    assert tail(log.path, 1, backups=3)[0]["name"] == "secret-29"
+
+
+def test_concurrent_writers_keep_one_chain_across_rotation(tmp_path):
+    logs = [_log(tmp_path, batch_size=5, max_bytes=2000, backups=1000) for _ in range(4)]
+
+    def _write(log, n):
+        for i in range(60):
+            log.record("get", f"w{n}-{i}")
+            if i % 5 == 4:
+                log.flush()
+
+    threads = [threading.Thread(target=_write, args=(log, n)) for n, log in enumerate(logs)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for log in logs:
+        log.close()
+    assert len(log_files(logs[0].path, 1000)) > 3
+    assert verify(logs[0].path, 1000) == (True, 240, "")
+
+
+def test_ring_overflow_is_recorded(tmp_path):
+    log = _log(tmp_path, capacity=3, batch_size=100)
+    for i in range(5):
+        log.record("get", f"s{i}")
+    log.close()
+    records = tail(log.path, 10)
+    assert records[0]["op"] == "dropped" and records[0]["count"] == 2
+    assert [r["name"] for r in records[1:]] == ["s2", "s3", "s4"]
+
+
+def test_storage_operations_are_audited_without_values(tmp_path):
+    log = storage.enable_audit(str(tmp_path / "audit.log"), flush_interval=60)
+    store_secret("db", "hunter2")
+    get_secret("db")
+    get_secret("missing")
+    delete_secret("db")
+    storage.disable_audit()
+    text = (tmp_path / "audit.log").read_text()
+    assert "hunter2" not in text
+    ops = [(r["op"], r["name"], r["ok"]) for r in tail(log.path, 10)]
+    assert ops == [
+        ("set", "db", True), ("get", "db", True), ("get", "missing", False), ("delete", "db", True)
+    ]
+
+
+def test_audit_cli_tail_and_verify(tmp_path, monkeypatch):
+    path = tmp_path / "audit.log"
+    monkeypatch.setenv("VAULTBUDDY_AUDIT_LOG", str(path))
+    runner = CliRunner()
+    runner.invoke(cli.app, ["list"])
+    store_secret("db", "x")
+    storage.disable_audit()
+
+    result = runner.invoke(cli.app, ["audit", "tail", "-n", "5"])
+    assert result.exit_code == 0, result.output
+    assert "set" in result.output and "db" in result.output
+    result = runner.invoke(cli.app, ["audit", "verify"])
+    assert result.exit_code == 0 and "1 records" in result.output
+
+    path.write_text(path.read_text().replace('"db"', '"xx"'))
+    result = runner.invoke(cli.app, ["audit", "verify"])
+    assert result.exit_code == 1
@@ -1,52 +1,10 @@
 import time
 import sys
-from typing import Dict
 
 import pytest
 
 from vaultbuddy.storage import is_secure_backend, init_db, store_secret, get_secret, delete_secret
-from vaultbuddy import cli
-
-
-class DummyKeyring:
-    """A minimal in-memory keyring backend for tests."""
-
-    __module__ = "keyring.backends.SecretService"
-    __name__ = "Dummy"
-
-    def __init__(self):
-        self._data: Dict[tuple[str, str], str] = {}
-
-    def get_password(self, service_name: str, username: str):
-        return self._data.get((service_name, username))
-
-    def set_password(self, service_name: str, username: str, password: str):
-        self._data[(service_name, username)] = password
-
-    def delete_password(self, service_name: str, username: str):
-        key = (service_name, username)
-        if key not in self._data:
-            import keyring
-            raise keyring.errors.PasswordDeleteError("not found")
-        del self._data[key]
-
-
-@pytest.fixture(autouse=True)
-def patch_keyring(monkeypatch):
-    import keyring
-
-    dummy = DummyKeyring()
-
-    def _get_keyring():
-        return dummy
-
-    monkeypatch.setattr(keyring, "get_keyring", _get_keyring)
-    monkeypatch.setattr(keyring, "get_password", dummy.get_password)
-    monkeypatch.setattr(keyring, "set_password", dummy.set_password)
-    monkeypatch.setattr(keyring, "delete_password", dummy.delete_password)
-    # Ensure fresh index
-    init_db(allow_insecure_backend=True)
-    yield
+from vaultbuddy import cli, storage
 
 
 def run_cli(runner, args: list[str]):
@@ -88,9 +46,9 @@ def test_verbose_mode_shows_name():
     assert "ex" in result.output
 
 
-def test_backend_detection_insecure(monkeypatch):
+def test_backend_detection_insecure(monkeypatch, patch_keyring):
     # Force an insecure identity
-    class InsecureDummy(DummyKeyring):
+    class InsecureDummy(type(patch_keyring)):
         __module__ = "keyrings.alt.file"
 
     insecure = InsecureDummy()
@@ -104,6 +62,8 @@ def test_backend_detection_insecure(monkeypatch):
     monkeypatch.setattr(keyring, "get_password", insecure.get_password)
     monkeypatch.setattr(keyring, "set_password", insecure.set_password)
     monkeypatch.setattr(keyring, "delete_password", insecure.delete_password)
+    # The default vault resolved the keyring already; start over with the patched one
+    storage.set_default_vault(None)
 
     ok, ident, reason = is_secure_backend()
     assert ok is False
@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+import time
+
+from typer.testing import CliRunner
+
+from vaultbuddy import cli, completion
+from vaultbuddy.storage import delete_secret, store_secret, transaction
+
+
+def test_cache_tracks_store_and_delete():
+    store_secret("Steam Login", "pw")
+    store_secret("github-token", "t")
+    assert completion.complete("St") == ["Steam Login"]
+    delete_secret("github-token")
+    assert completion.read_name_cache() == ["Steam Login"]
+    with transaction():
+        store_secret("aws", "k")
+    assert completion.complete("") == ["Steam Login", "aws"]
+
+
+def test_cache_never_contains_values():
+    store_secret("db", "hunter2")
+    with open(completion.cache_path()) as fh:
+        assert "hunter2" not in fh.read()
+    if os.name == "posix":
+        assert (os.stat(completion.cache_path()).st_mode & 0o777) == 0o600
+
+
+def test_stale_cache_is_ignored(monkeypatch):
+    store_secret("db", "x")
+    monkeypatch.setattr(time, "time", lambda: 10**12)
+    assert completion.read_name_cache() is None
+    assert completion.complete("d") == []
+
+
+def test_cli_run_refreshes_stale_cache(monkeypatch):
+    store_secret("db", "x")
+    os.unlink(completion.cache_path())
+    result = CliRunner().invoke(cli.app, ["list"])
+    assert result.exit_code == 0, result.output
+    assert completion.read_name_cache() == ["db"]
+
+
+def test_completion_script_lists_commands():
+    result = CliRunner().invoke(cli.app, ["completion", "bash"])
+    assert result.exit_code == 0, result.output
+    assert "complete -o default -F _vaultbuddy_complete vaultbuddy" in result.output
+    assert "get|delete" in result.output
+    assert "sync audit" in result.output
+    for shell in ("zsh", "fish"):
+        assert CliRunner().invoke(cli.app, ["completion", shell]).exit_code == 0
+    assert CliRunner().invoke(cli.app, ["completion", "tcsh"]).exit_code != 0
+
+
+def test_completion_helper_never_imports_keyring():
+    store_secret("db", "x")
+    code = (
+        "import sys; from vaultbuddy.completion import main; main(['--', 'd']); "
+        "assert 'keyring' not in sys.modules and 'typer' not in sys.modules"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=os.environ.copy()
+    )
+    assert out.returncode == 0, out.stderr
+    assert out.stdout == "db\n"
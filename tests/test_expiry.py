@@ -0,0 +1,121 @@
+import time
+
+from typer.testing import CliRunner
+
+from vaultbuddy import cli
+from vaultbuddy.backends import MemoryBackend
+from vaultbuddy.storage import (
+    INDEX_USERNAME,
+    SERVICE_NAME,
+    get_secret,
+    list_secrets,
+    store_secret,
+    sweep,
+    transaction,
+)
+from vaultbuddy.vault import Vault
+
+
+class CountingBackend(MemoryBackend):
+    def __init__(self):
+        super().__init__()
+        self.gets = []
+        self.index_writes = 0
+
+    def get_password(self, service, username):
+        self.gets.append(username)
+        return super().get_password(service, username)
+
+    def set_password(self, service, username, password):
+        if username == INDEX_USERNAME:
+            self.index_writes += 1
+        super().set_password(service, username, password)
+
+
+def test_expired_secret_reads_as_missing_without_backend_call():
+    backend = CountingBackend()
+    vault = Vault(backend)
+    vault.store_secret("token", "t", expires_at=time.time() - 1)
+    vault.store_secret("db", "pw", expires_at=time.time() + 3600)
+    backend.gets.clear()
+    assert vault.get_secret("token") is None
+    assert backend.gets == []
+    assert vault.get_secret("db") == "pw"
+    assert vault.list_secrets() == ["db"]
+
+
+def test_sweep_pops_only_due_entries_with_one_index_write():
+    backend = CountingBackend()
+    vault = Vault(backend)
+    now = time.time()
+    with vault.transaction():
+        for i in range(50):
+            vault.store_secret(f"keep-{i}", "v")
+        vault.store_secret("a", "1", expires_at=now - 20)
+        vault.store_secret("b", "2", expires_at=now - 10)
+        vault.store_secret("later", "3", expires_at=now + 3600)
+        vault.store_secret("renewed", "4", expires_at=now - 5)
+    # Overwriting without a TTL makes the secret permanent again
+    vault.store_secret("renewed", "5")
+    backend.index_writes = 0
+
+    assert vault.sweep(now) == ["a", "b"]
+    assert backend.index_writes == 1
+    assert backend.get_password(SERVICE_NAME, "a") is None
+    assert vault.get_secret("renewed") == "5"
+    assert vault.sweep(now) == []
+    assert backend.index_writes == 1
+    # Deadlines survive a reload from the backend
+    assert Vault(backend).sweep(now + 7200) == ["later"]
+
+
+def test_cli_add_with_ttl_and_sweep(monkeypatch, patch_keyring):
+    monkeypatch.setattr("getpass.getpass", lambda prompt="": "s3cr3t")
+    runner = CliRunner()
+    result = runner.invoke(cli.app, ["add", "session", "--ttl", "15m"])
+    assert result.exit_code == 0, result.output
+    assert get_secret("session") == "s3cr3t"
+    assert runner.invoke(cli.app, ["add", "x", "--ttl", "soon"]).exit_code != 0
+
+    store_secret("stale", "v", expires_at=time.time() - 1)
+    assert list_secrets() == ["session"]
+    result = runner.invoke(cli.app, ["--verbose", "sweep"])
+    assert result.exit_code == 0, result.output
+    assert "Removed 1 expired" in result.output and "stale" in result.output
+    assert (SERVICE_NAME, "stale") not in patch_keyring._data
+    assert sweep() == []
+
+
+def test_expiry_inside_a_transaction():
+    with transaction():
+        store_secret("t", "v", expires_at=time.time() - 1)
+        assert get_secret("t") is None
+    assert get_secret("t") is None
+    assert sweep() == ["t"]
+
+
+def test_sweep_purges_tombstones_after_the_grace_period(monkeypatch):
+    monkeypatch.setenv("VAULTBUDDY_TOMBSTONE_GRACE", "100")
+    vault = Vault(MemoryBackend())
+    now = time.time()
+    vault.store_secret("token", "t", expires_at=now - 1)
+    vault.store_secret("db", "pw")
+    vault.delete_secret("db")
+    assert vault.sweep(now) == ["token"]
+    assert sorted(vault.index_entries()[1]) == ["db", "token"]
+    assert vault.sweep(now + 99) == []
+    assert sorted(vault.index_entries()[1]) == ["db", "token"]
+    assert vault.sweep(now + 101) == []
+    assert vault.index_entries()[1] == {}
+    assert Vault(vault.backend).index_entries()[1] == {}
+
+
+def test_list_inside_a_transaction_uses_staged_deadlines():
+    store_secret("old", "v", expires_at=time.time() - 1)
+    with transaction():
+        store_secret("t", "v", expires_at=time.time() - 1)
+        store_secret("old", "renewed")
+        assert get_secret("t") is None
+        assert get_secret("old") == "renewed"
+        assert list_secrets() == ["old"]
+    assert list_secrets() == ["old"]
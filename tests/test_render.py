@@ -0,0 +1,88 @@
+import os
+import threading
+
+import pytest
+from typer.testing import CliRunner
+
+from vaultbuddy import cli
+from vaultbuddy.render import find_references, render_file, resolve
+from vaultbuddy.storage import store_secret
+
+
+def test_references_are_deduplicated_in_order():
+    text = "A={{ secret:a }}\nB={{secret:Steam Login}}\nA2={{ secret:a }}\n{{ other }}"
+    assert find_references(text) == ["a", "Steam Login"]
+
+
+def test_resolve_fetches_each_name_once_in_parallel():
+    seen = []
+    lock = threading.Lock()
+
+    def fetch(name):
+        with lock:
+            seen.append(name)
+        return name.upper()
+
+    assert resolve(["a", "b", "c"], fetch=fetch, jobs=3) == {"a": "A", "b": "B", "c": "C"}
+    assert sorted(seen) == ["a", "b", "c"]
+
+
+def test_render_writes_atomically_and_skips_unchanged(tmp_path):
+    store_secret("db", "pw")
+    store_secret("api", "k")
+    template = tmp_path / "env.in"
+    template.write_text("DB={{ secret:db }}\r\nAPI={{ secret:api }}\r\nDB_AGAIN={{secret:db}}\r\n")
+    out = tmp_path / ".env"
+
+    assert render_file(str(template), str(out)) is True
+    assert out.read_bytes() == b"DB=pw\r\nAPI=k\r\nDB_AGAIN=pw\r\n"
+    if os.name == "posix":
+        assert (out.stat().st_mode & 0o777) == 0o600
+    mtime = out.stat().st_mtime_ns
+    assert render_file(str(template), str(out)) is False
+    assert out.stat().st_mtime_ns == mtime
+
+    store_secret("api", "rotated")
+    assert render_file(str(template), str(out)) is True
+    assert b"API=rotated" in out.read_bytes()
+
+
+@pytest.mark.skipif(os.name != "posix", reason="symlinks and modes are POSIX-only here")
+def test_render_never_reuses_a_planted_temp_file(monkeypatch, tmp_path):
+    store_secret("db", "pw")
+    template = tmp_path / "env.in"
+    template.write_text("DB={{ secret:db }}\n")
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.write_text("")
+    suffixes = iter([b"\x00" * 6, b"\x01" * 6])
+    monkeypatch.setattr(os, "urandom", lambda n: next(suffixes))
+    # Someone guessed the temp name: a symlink out of the directory
+    for guess in (f".app.env.{'00' * 6}.tmp", f".app.env.{os.getpid()}.tmp"):
+        os.symlink(elsewhere, tmp_path / guess)
+    old_umask = os.umask(0)
+    try:
+        assert render_file(str(template), str(tmp_path / "app.env")) is True
+    finally:
+        os.umask(old_umask)
+    assert elsewhere.read_text() == ""
+    assert not (tmp_path / "app.env").is_symlink()
+    assert ((tmp_path / "app.env").stat().st_mode & 0o777) == 0o600
+
+
+def test_render_command_reports_missing_without_writing(tmp_path):
+    store_secret("db", "pw")
+    template = tmp_path / "env.in"
+    template.write_text("DB={{ secret:db }}\nX={{ secret:nope }}\n")
+    out = tmp_path / ".env"
+    result = CliRunner().invoke(cli.app, ["render", str(template), "-o", str(out)])
+    assert result.exit_code == 1
+    assert "1 referenced secret(s) not found" in result.output
+    assert "nope" not in result.output
+    assert not out.exists()
+
+    template.write_text("DB={{ secret:db }}\n")
+    result = CliRunner().invoke(cli.app, ["render", str(template), "-o", str(out)])
+    assert result.exit_code == 0, result.output
+    assert "pw" not in result.output
+    result = CliRunner().invoke(cli.app, ["render", str(template), "-o", str(out)])
+    assert "up to date" in result.output
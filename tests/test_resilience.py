@@ -0,0 +1,149 @@
+import sys
+import threading
+
+import pytest
+
+from vaultbuddy import cli, storage
+from vaultbuddy.backends import KeyringBackend, KeyringLocked
+from vaultbuddy.resilience import (
+    BackendError,
+    BackendTimeoutError,
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientCaller,
+)
+from vaultbuddy.vault import Vault
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _caller(clock=None, **kwargs):
+    breaker = CircuitBreaker(3, 10.0, clock=clock or FakeClock())
+    kwargs.setdefault("timeout", 0)
+    return ResilientCaller(breaker=breaker, sleep=lambda s: None, **kwargs)
+
+
+def test_transient_errors_are_retried():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise OSError("dbus hiccup")
+        return "ok"
+
+    caller = _caller(retries=2)
+    assert caller.call(flaky) == "ok"
+    assert caller.stats()["retries"] == 2
+    assert not caller.breaker.is_open
+
+
+def test_breaker_opens_and_recovers_after_cooldown():
+    clock = FakeClock()
+    caller = _caller(clock=clock, retries=0)
+
+    def broken():
+        raise OSError("down")
+
+    for _ in range(3):
+        with pytest.raises(BackendError):
+            caller.call(broken)
+    with pytest.raises(CircuitOpenError):
+        caller.call(lambda: "never called")
+    stats = caller.stats()
+    assert stats["breaker_trips"] == 1 and stats["short_circuits"] == 1
+
+    clock.now = 11.0
+    assert caller.call(lambda: "back") == "back"
+    assert not caller.breaker.is_open
+
+
+def test_passthrough_errors_do_not_count_as_failures():
+    caller = _caller(passthrough=(KeyError,))
+
+    def missing():
+        raise KeyError("nope")
+
+    for _ in range(5):
+        with pytest.raises(KeyError):
+            caller.call(missing)
+    assert caller.stats()["failures"] == 0
+
+
+def test_hung_backend_times_out_and_trips_breaker(monkeypatch, patch_keyring):
+    release = threading.Event()
+
+    def hang(service, username):
+        release.wait(5)
+
+    storage.configure_backend(timeout=0.05)
+    monkeypatch.setattr(patch_keyring, "get_password", hang)
+    try:
+        with pytest.raises(BackendTimeoutError, match="within 0.05s"):
+            storage.get_secret("db")
+        # Further calls fail immediately instead of hanging again
+        with pytest.raises(CircuitOpenError):
+            storage.get_secret("db")
+    finally:
+        release.set()
+    stats = storage.backend_stats()
+    assert stats["timeouts"] == 1 and stats["short_circuits"] == 1
+
+
+def test_cli_reports_backend_errors(monkeypatch, capsys, patch_keyring):
+    def hang(service, username):
+        threading.Event().wait(5)
+
+    monkeypatch.setattr(patch_keyring, "get_password", hang)
+    monkeypatch.setattr(sys, "argv", ["vaultbuddy", "--backend-timeout", "0.05", "list"])
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main()
+    assert exc_info.value.code == 2
+    assert "did not respond" in capsys.readouterr().err
+
+
+def test_keyring_resolution_runs_under_the_timeout(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr("keyring.get_keyring", lambda: release.wait(5))
+    vault = Vault(KeyringBackend())
+    vault.configure(timeout=0.05)
+    try:
+        with pytest.raises(BackendTimeoutError, match="identity"):
+            vault.open(allow_insecure_backend=True)
+    finally:
+        release.set()
+
+
+def test_locked_keyring_is_reported_without_retries(monkeypatch, patch_keyring):
+    def locked(service, username):
+        raise KeyringLocked("collection is locked")
+
+    monkeypatch.setattr(patch_keyring, "get_password", locked)
+    storage.refresh()
+    with pytest.raises(BackendError, match="collection is locked"):
+        storage.get_secret("db")
+    stats = storage.backend_stats()
+    assert stats["retries"] == 0 and stats["failures"] == 0
+
+
+def test_interactive_menu_survives_backend_errors(monkeypatch, capsys, patch_keyring):
+    def hang(service, username):
+        threading.Event().wait(5)
+
+    def choose(prompt=""):
+        # The keyring stops answering once the menu is up
+        monkeypatch.setattr(patch_keyring, "get_password", hang)
+        return next(choices)
+
+    storage.configure_backend(timeout=0.05)
+    choices = iter(["3", "5"])
+    monkeypatch.setattr("builtins.input", choose)
+    cli.interactive()
+    out = capsys.readouterr().out
+    assert "did not respond" in out and "Goodbye!" in out
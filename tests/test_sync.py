@@ -0,0 +1,223 @@
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+from typer.testing import CliRunner
+
+from vaultbuddy import cli, storage
+from vaultbuddy.backends import MemoryBackend
+from vaultbuddy.storage import INDEX_USERNAME, delete_secret, get_secret, list_secrets, store_secret
+from vaultbuddy.vault import Vault
+
+pytest.importorskip("cryptography")
+
+from vaultbuddy.sync import (  # noqa: E402
+    Channel,
+    DigestTree,
+    SyncError,
+    VaultReplica,
+    _hang_up,
+    _incoming,
+    serve_session,
+    serve_socket,
+    spawn_command,
+    stop_command,
+    sync_client,
+)
+
+
+def _peer():
+    """A second, isolated vault to sync the default one against."""
+    return VaultReplica(Vault(MemoryBackend()))
+
+
+@contextmanager
+def _served(server_passphrase="pw"):
+    """Serves the default vault on a socketpair; yields the client channel and server errors."""
+    client_sock, server_sock = socket.socketpair()
+    errors = []
+
+    def _serve():
+        try:
+            with server_sock:
+                channel = Channel(server_sock.makefile("rb"), server_sock.makefile("wb"))
+                try:
+                    serve_session(channel, VaultReplica(), server_passphrase)
+                finally:
+                    _hang_up(server_sock)
+        except Exception as exc:
+            errors.append(exc)
+
+    server = threading.Thread(target=_serve)
+    server.start()
+    try:
+        with client_sock:
+            yield Channel(client_sock.makefile("rb"), client_sock.makefile("wb")), errors
+    finally:
+        _hang_up(client_sock)
+        server.join(5)
+
+
+def _loopback(client_replica, passphrase="pw", server_passphrase="pw"):
+    with _served(server_passphrase) as (channel, _):
+        return sync_client(channel, client_replica, passphrase)
+
+
+def test_digest_tree_detects_single_change():
+    entries = {f"k{i}": (1, "a", False) for i in range(100)}
+    same = DigestTree(dict(entries))
+    entries["k7"] = (2, "a", False)
+    changed = DigestTree(entries)
+    assert DigestTree({f"k{i}": (1, "a", False) for i in range(100)}).root == same.root
+    assert changed.root != same.root
+
+
+def test_sync_pulls_pushes_and_propagates_deletes():
+    store_secret("local-only", "L")
+    store_secret("shared", "old")
+    store_secret("doomed", "x")
+    peer = _peer()
+    peer.vault.store_secret("peer-only", "P")
+    # The client (peer) pulls what only the served vault has and pushes the rest
+    report = _loopback(peer)
+    assert report.pulled == 3 and report.pushed == 1
+    assert get_secret("peer-only") == "P"
+    assert peer.vault.get_secret("shared") == "old"
+
+    # Changes on both sides travel; a deletion propagates as a tombstone
+    store_secret("shared", "new")
+    delete_secret("doomed")
+    peer.vault.store_secret("peer-only", "P2")
+    report = _loopback(peer)
+    assert report.pulled == 2 and report.pushed == 1
+    assert peer.vault.get_secret("shared") == "new"
+    assert peer.vault.get_secret("doomed") is None
+    assert peer.vault.list_secrets() == ["local-only", "peer-only", "shared"]
+    assert get_secret("peer-only") == "P2"
+    assert list_secrets() == ["local-only", "peer-only", "shared"]
+
+    # Converged: one round-trip of digests after the handshake
+    report = _loopback(peer)
+    assert report.pulled == report.pushed == 0
+    assert report.round_trips == 2
+
+
+def test_near_identical_large_vault_moves_kilobytes():
+    storage.configure_backend(timeout=0)
+    peer = _peer()
+    with peer.vault.transaction():
+        for i in range(10_000):
+            peer.vault.store_secret(f"secret-{i:05d}", f"value-{i}")
+    _loopback(peer)
+    assert len(list_secrets()) == 10_000
+
+    store_secret("secret-00042", "rotated")
+    peer.vault.store_secret("secret-09000", "rotated-on-peer")
+    report = _loopback(peer)
+    assert report.pulled == 1 and report.pushed == 1
+    assert peer.vault.get_secret("secret-00042") == "rotated"
+    assert get_secret("secret-09000") == "rotated-on-peer"
+    assert report.bytes_sent + report.bytes_received < 16 * 1024
+    assert report.round_trips <= 6
+
+
+def test_wrong_passphrase_fails_without_transfer():
+    peer = _peer()
+    peer.vault.store_secret("peer-only", "P")
+    with pytest.raises(SyncError):
+        _loopback(peer, passphrase="right", server_passphrase="wrong")
+    assert get_secret("peer-only") is None
+
+
+@pytest.mark.parametrize("name", ["evil\tname\nforged\t999\tzz", INDEX_USERNAME, "__wal__:x", ""])
+def test_server_rejects_invalid_pushed_names(name):
+    store_secret("db", "pw")
+    with _served() as (channel, errors):
+        channel.handshake_client("pw")
+        with pytest.raises(SyncError, match="Peer error"):
+            channel.request({
+                "op": "exchange",
+                "want": [],
+                "push": [{"n": name, "v": 9, "o": "zz", "d": name == INDEX_USERNAME, "s": "x"}],
+            })
+    assert errors and isinstance(errors[0], SyncError)
+    # Nothing was applied and the vault is still readable
+    assert list_secrets() == ["db"]
+    assert Vault(storage.default_vault().backend).list_secrets() == ["db"]
+
+
+@pytest.mark.parametrize("entry", [
+    {"n": "db", "o": "a", "d": False, "s": "x"},
+    {"n": "db", "v": 1, "d": False, "s": "x"},
+    {"n": "db", "v": 1, "o": "a", "d": False},
+    {"n": "db", "v": "1", "o": "a", "d": False, "s": "x"},
+    {"n": "db", "v": 1, "o": "a\nb", "d": False, "s": "x"},
+    {"n": "db", "v": 1, "o": "a", "d": False, "s": "x", "x": "soon"},
+    "not-an-entry",
+])
+def test_malformed_entries_are_rejected(entry):
+    with pytest.raises(SyncError):
+        _incoming([entry])
+
+
+def test_missing_cryptography_fails_before_contacting_peer(monkeypatch, tmp_path):
+    monkeypatch.setitem(sys.modules, "cryptography.hazmat.primitives.ciphers.aead", None)
+    monkeypatch.setenv("VAULTBUDDY_SYNC_PASSPHRASE", "pw")
+    args = ["sync", "connect", "--socket", str(tmp_path / "none.sock")]
+    result = CliRunner().invoke(cli.app, args)
+    assert result.exit_code == 1
+    assert "pip install vaultbuddy[sync]" in result.output
+    assert result.exception is None or isinstance(result.exception, SystemExit)
+
+
+def test_replica_apply_refuses_entries_that_would_corrupt_the_index():
+    replica = _peer()
+    with pytest.raises(SyncError):
+        evil = {"n": "evil\tname\nforged\t999\tzz", "v": 1, "o": "a", "d": False, "s": "x"}
+        replica.apply([evil])
+    replica.vault.refresh()
+    assert replica.vault.list_secrets() == []
+
+
+def test_deadlines_travel_with_synced_entries():
+    now = time.time()
+    store_secret("token", "t", expires_at=now + 60)
+    store_secret("gone", "g")
+    delete_secret("gone")
+    peer = _peer()
+    _loopback(peer)
+    assert peer.vault.get_secret("token") == "t"
+    # The peer expires the secret and purges the tombstone on the same schedule
+    assert peer.vault.index_deadlines() == storage.default_vault().index_deadlines()
+    assert peer.vault.sweep(now + 61) == ["token"]
+    peer.vault.sweep(now + storage.default_vault().tombstone_grace + 120)
+    assert peer.vault.index_entries()[1] == {}
+
+    # A tombstone past its purge deadline is not re-added where it is unknown
+    peer.apply([{"n": "old", "v": 3, "o": "zz", "d": True, "x": int(now) - 1}])
+    assert "old" not in peer.vault.index_entries()[1]
+
+
+def test_stdio_server_never_prompts_on_the_protocol_stream(monkeypatch):
+    monkeypatch.delenv("VAULTBUDDY_SYNC_PASSPHRASE", raising=False)
+    monkeypatch.setattr("getpass.getpass", lambda prompt="": pytest.fail("prompted"))
+    result = CliRunner().invoke(cli.app, ["sync", "serve", "--stdio"])
+    assert result.exit_code == 1
+    assert "--passphrase-file" in result.output
+
+
+def test_serve_socket_refuses_to_replace_a_regular_file(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("keep me")
+    with pytest.raises(SyncError, match="not a socket"):
+        serve_socket(str(path), _peer(), "pw", once=True)
+    assert path.read_text() == "keep me"
+
+
+def test_stop_command_terminates_a_peer_that_does_not_exit():
+    _, proc = spawn_command([sys.executable, "-c", "import time; time.sleep(60)"])
+    stop_command(proc, timeout=0.2)
+    assert proc.returncode is not None
@@ -0,0 +1,152 @@
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from vaultbuddy import cli, wal
+from vaultbuddy.backends import MemoryBackend
+from vaultbuddy.storage import (
+    INDEX_USERNAME,
+    SERVICE_NAME,
+    WAL_USERNAME_PREFIX,
+    delete_secret,
+    get_secret,
+    list_secrets,
+    recover_pending,
+    store_secret,
+    transaction,
+)
+from vaultbuddy.vault import Vault
+
+
+def _index_writes(monkeypatch, dummy):
+    writes = []
+    original = dummy.set_password
+
+    def _set(service, username, password):
+        if username == INDEX_USERNAME:
+            writes.append(password)
+        original(service, username, password)
+
+    monkeypatch.setattr(dummy, "set_password", _set)
+    return writes
+
+
+def test_batch_commits_index_once(monkeypatch, patch_keyring):
+    store_secret("old", "x")
+    writes = _index_writes(monkeypatch, patch_keyring)
+    with transaction() as txn:
+        for i in range(30):
+            store_secret(f"k{i}", f"v{i}")
+        delete_secret("old")
+        # Reads inside the block see staged state
+        assert get_secret("k3") == "v3"
+        assert "old" not in list_secrets()
+        assert len(txn) == 31
+    assert len(writes) == 1
+    assert get_secret("k29") == "v29"
+    assert get_secret("old") is None
+    assert "old" not in list_secrets()
+    assert wal.pending_txids() == []
+    assert not any(k[1].startswith(WAL_USERNAME_PREFIX) for k in patch_keyring._data)
+
+
+def test_exception_discards_batch():
+    with pytest.raises(ValueError):
+        with transaction():
+            store_secret("a", "1")
+            raise ValueError("boom")
+    assert get_secret("a") is None
+    assert list_secrets() == []
+
+
+def test_crash_after_commit_marker_is_replayed(monkeypatch, patch_keyring):
+    def _crash(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    replay = Vault._replay
+    monkeypatch.setattr(Vault, "_replay", _crash)
+    with pytest.raises(KeyboardInterrupt):
+        with transaction():
+            store_secret("a", "1")
+            store_secret("b", "2")
+    monkeypatch.setattr(Vault, "_replay", replay)
+
+    assert get_secret("a") is None
+    assert recover_pending() == "replayed"
+    assert get_secret("a") == "1"
+    assert list_secrets() == ["a", "b"]
+    assert wal.pending_txids() == []
+
+
+def test_recovery_skips_a_batch_another_session_is_running(tmp_path):
+    backend = MemoryBackend()
+    log = str(tmp_path / "wal")
+    running, other = Vault(backend, wal_path=log), Vault(backend, wal_path=log)
+    seen = []
+
+    def _replay_then_crash(self, txid, ops, values):
+        # A second process starting up mid-batch must leave the batch alone
+        seen.append(other.recover_pending())
+        raise KeyboardInterrupt
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(Vault, "_replay", _replay_then_crash)
+        with pytest.raises(KeyboardInterrupt):
+            with running.transaction():
+                running.store_secret("a", "1")
+    assert seen == [None]
+    assert len(wal.pending_txids(log)) == 1
+    assert other.recover_pending() == "replayed"
+    assert Vault(backend).list_secrets() == ["a"]
+    assert wal.pending_txids(log) == []
+
+
+def test_crash_before_commit_marker_is_rolled_back(patch_keyring):
+    wal.write_wal("t1", wal.STATE_PENDING, [{"op": "set", "name": "a"}])
+    patch_keyring.set_password(SERVICE_NAME, WAL_USERNAME_PREFIX + "t1", json.dumps({"a": "1"}))
+    assert recover_pending() == "rolled back"
+    assert get_secret("a") is None
+    assert patch_keyring.get_password(SERVICE_NAME, WAL_USERNAME_PREFIX + "t1") is None
+
+
+def test_apply_command(tmp_path):
+    store_secret("gone", "x")
+    plan = tmp_path / "plan.jsonl"
+    plan.write_text(
+        '{"op": "set", "name": "db", "value": "pw"}\n'
+        "\n"
+        '{"op": "delete", "name": "gone"}\n'
+    )
+    result = CliRunner().invoke(cli.app, ["apply", str(plan)])
+    assert result.exit_code == 0, result.output
+    assert "2 operations (1 stored, 1 deleted)" in result.output
+    assert get_secret("db") == "pw"
+    assert list_secrets() == ["db"]
+
+
+def test_apply_counts_only_existing_deletes(tmp_path):
+    plan = tmp_path / "plan.jsonl"
+    plan.write_text('{"op": "delete", "name": "never-stored"}\n')
+    result = CliRunner().invoke(cli.app, ["apply", str(plan)])
+    assert result.exit_code == 0, result.output
+    assert "1 operations (0 stored, 0 deleted)" in result.output
+
+
+def test_apply_rejects_bad_plan_without_changes(tmp_path):
+    plan = tmp_path / "plan.jsonl"
+    plan.write_text('{"op": "set", "name": "db", "value": "pw"}\n{"op": "set", "name": "x"}\n')
+    result = CliRunner().invoke(cli.app, ["apply", str(plan)])
+    assert result.exit_code != 0
+    assert "line 2" in result.output
+    assert get_secret("db") is None
+
+
+def test_apply_reads_plan_from_stdin_and_rejects_missing_file(tmp_path):
+    plan = '{"op": "set", "name": "db", "value": "pw"}\n'
+    result = CliRunner().invoke(cli.app, ["apply", "-"], input=plan)
+    assert result.exit_code == 0, result.output
+    assert get_secret("db") == "pw"
+    result = CliRunner().invoke(cli.app, ["apply", str(tmp_path / "missing.jsonl")])
+    assert result.exit_code == 2
+    assert "cannot read plan" in result.output
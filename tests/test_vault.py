@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from vaultbuddy import storage
+from vaultbuddy.backends import MemoryBackend, NullBackend
+from vaultbuddy.storage import INDEX_USERNAME, SERVICE_NAME, get_secret, list_secrets
+from vaultbuddy.vault import Vault
+
+
+def test_vaults_are_isolated_side_by_side():
+    a, b = Vault(MemoryBackend()), Vault(MemoryBackend())
+    a.store_secret("db", "from-a")
+    with b.transaction():
+        b.store_secret("db", "from-b")
+        b.store_secret("api", "key")
+    assert a.get_secret("db") == "from-a"
+    assert b.get_secret("db") == "from-b"
+    assert a.list_secrets() == ["db"]
+    assert b.list_secrets() == ["api", "db"]
+    # Neither touches the default keyring-backed vault
+    assert get_secret("db") is None
+    assert list_secrets() == []
+
+
+def test_reads_use_the_cached_index_and_writes_reread_it():
+    backend = MemoryBackend()
+    reads = []
+    original = backend.get_password
+
+    def _get(service, username):
+        if username == INDEX_USERNAME:
+            reads.append(username)
+        return original(service, username)
+
+    backend.get_password = _get
+    vault = Vault(backend)
+    for i in range(5):
+        vault.store_secret(f"k{i}", "v")
+    assert vault.delete_secret("k0")
+    assert len(reads) == 6
+    for _ in range(3):
+        assert vault.list_secrets() == ["k1", "k2", "k3", "k4"]
+    assert len(reads) == 6
+    # Another session over the same backend sees the committed index
+    assert Vault(backend).list_secrets() == ["k1", "k2", "k3", "k4"]
+
+
+def test_null_backend_stores_nothing():
+    vault = Vault(NullBackend())
+    vault.store_secret("db", "pw")
+    assert vault.get_secret("db") is None
+    assert vault.delete_secret("db") is False
+
+
+def test_open_refuses_unrecognised_backend():
+    with pytest.raises(RuntimeError, match="MemoryBackend"):
+        Vault(MemoryBackend()).open()
+    vault = Vault(MemoryBackend()).open(allow_insecure_backend=True)
+    assert vault.list_secrets() == []
+
+
+def test_module_functions_use_the_default_vault(patch_keyring):
+    vault = Vault(MemoryBackend())
+    storage.set_default_vault(vault)
+    storage.store_secret("db", "pw")
+    assert vault.get_secret("db") == "pw"
+    assert (SERVICE_NAME, "db") not in patch_keyring._data
+
+
+def test_sessions_sharing_a_backend_keep_each_others_writes():
+    backend = MemoryBackend()
+    a, b = Vault(backend), Vault(backend)
+    a.store_secret("a", "1")
+    assert a.list_secrets() == ["a"]  # index now cached in a
+    b.store_secret("x", "2")
+    a.store_secret("c", "3")
+    with a.transaction():
+        a.store_secret("pushed", "4")
+    assert a.delete_secret("c")
+    assert Vault(backend).list_secrets() == ["a", "pushed", "x"]
+    b.refresh()
+    assert b.list_secrets() == ["a", "pushed", "x"]
+
+
+class SlowIndexBackend(MemoryBackend):
+    """Widens the gap between reading and writing the index."""
+
+    def get_password(self, service, username):
+        value = super().get_password(service, username)
+        if username == INDEX_USERNAME:
+            time.sleep(0.002)
+        return value
+
+
+def test_sessions_sharing_an_index_lock_never_lose_updates(tmp_path):
+    backend = SlowIndexBackend()
+    lock = str(tmp_path / "index.lock")
+    vaults = [Vault(backend, index_lock=lock) for _ in range(2)]
+
+    def _writer(vault, prefix):
+        for i in range(20):
+            vault.store_secret(f"{prefix}{i}", "v")
+
+    threads = [
+        threading.Thread(target=_writer, args=(v, p)) for v, p in zip(vaults, "ab", strict=True)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(Vault(backend).list_secrets()) == 40